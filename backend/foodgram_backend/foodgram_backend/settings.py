@@ -36,10 +36,28 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
-    ]
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'recipes.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'recipes.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+if os.getenv('FAST_JSON', 'true').lower() != 'true':
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'][0] = (
+        'rest_framework.renderers.JSONRenderer'
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'][0] = (
+        'rest_framework.parsers.JSONParser'
+    )
+
 MIDDLEWARE = [
+    'recipes.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,6 +98,19 @@ DATABASES = {
     }
 }
 
+# Версии содержимого, кеш ответов и индексы в памяти сверяются через
+# этот кеш, поэтому он должен быть общим для всех воркеров и
+# management-команд. LocMemCache годится только для одного процесса.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.PyMemcacheCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'memcached:11211'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -117,4 +148,11 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DOCS_URL = '/docs/'
 DOCS_ROOT = os.path.join(BASE_DIR, 'docs')
 
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
@@ -6,6 +6,7 @@ from recipes.models import (
     IngredientRecipe,
     Recipe,
     ShoppingCart,
+    ShoppingListIngredient,
     Tag,
 )
 
@@ -30,9 +31,12 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     search_fields = ('name', 'tags__name', 'author__username')
     list_filter = ('author', 'name', 'tags')
+    readonly_fields = (
+        'favorites_count', 'carts_count', 'ingredients_count'
+    )
 
     def in_favorite(self, obj):
-        return obj.favorites.all().count()
+        return obj.favorites_count
 
     in_favorite.short_description = 'Cколько раз рецепт добавлен в избранное'
 
@@ -59,6 +63,11 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
 
 
+@admin.register(ShoppingListIngredient)
+class ShoppingListIngredientAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'amount')
+
+
 @admin.register(IngredientRecipe)
 class IngredientRecipeAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount')
@@ -0,0 +1,8 @@
+from django.db.models import F
+
+
+def change_counter(queryset, field, delta):
+    """Атомарное изменение счетчика без ухода ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
@@ -0,0 +1,184 @@
+import heapq
+
+from django.db import connection
+from django.db.models import Q
+
+from recipes.models import FeedEntry, Recipe
+from users.constants import FEED_FANOUT_MAX_FOLLOWERS, FEED_TIMELINE_LIMIT
+from users.models import Follow, User
+
+INSERT_FEED_ENTRIES_SQL = f'''
+    INSERT INTO {FeedEntry._meta.db_table} (user_id, recipe_id, pub_date)
+    SELECT follow.user_id, recipe.id, recipe.pub_date
+    FROM (
+        SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+        ) AS position
+        FROM {Recipe._meta.db_table}
+        WHERE {{recipe_condition}}
+    ) AS recipe
+    JOIN {Follow._meta.db_table} AS follow
+        ON follow.following_id = recipe.author_id
+    JOIN {User._meta.db_table} AS author ON author.id = recipe.author_id
+    WHERE recipe.position <= %s AND author.followers_count < %s
+        AND {{follow_condition}}
+    ON CONFLICT DO NOTHING
+'''
+
+TRIM_FEEDS_SQL = f'''
+    DELETE FROM {FeedEntry._meta.db_table} WHERE id IN (
+        SELECT id FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY user_id ORDER BY pub_date DESC, recipe_id DESC
+            ) AS position
+            FROM {FeedEntry._meta.db_table}
+            WHERE {{condition}}
+        ) AS entry
+        WHERE entry.position > %s
+    )
+'''
+
+FOLLOWERS_CONDITION = (
+    f'user_id IN (SELECT user_id FROM {Follow._meta.db_table} '
+    'WHERE following_id = %s)'
+)
+
+
+def execute(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def insert_feed_entries(
+    recipe_condition, recipe_params, follow_condition, follow_params
+):
+    """Запись рецептов авторов с рассылкой в ленты их подписчиков.
+
+    От каждого автора берутся не больше FEED_TIMELINE_LIMIT новых
+    рецептов. Одна вставка из подписок без чтения лент, поэтому
+    параллельные публикации не теряют записи, а повторы пропускаются по
+    уникальности.
+    """
+    execute(
+        INSERT_FEED_ENTRIES_SQL.format(
+            recipe_condition=recipe_condition,
+            follow_condition=follow_condition,
+        ),
+        [
+            *recipe_params, FEED_TIMELINE_LIMIT, FEED_FANOUT_MAX_FOLLOWERS,
+            *follow_params,
+        ]
+    )
+
+
+def trim_feeds(condition, params):
+    """Удаление записей лент старше FEED_TIMELINE_LIMIT новых."""
+    execute(
+        TRIM_FEEDS_SQL.format(condition=condition),
+        [*params, FEED_TIMELINE_LIMIT]
+    )
+
+
+def fan_out_recipe(recipe):
+    """Добавление нового рецепта в ленты подписчиков автора.
+
+    У авторов с большим числом подписчиков рецепты не рассылаются, а
+    подмешиваются в ленту при чтении.
+    """
+    insert_feed_entries('id = %s', [recipe.id], '1 = 1', [])
+    trim_feeds(FOLLOWERS_CONDITION, [recipe.author_id])
+
+
+def fan_out_author(author_id):
+    """Рассылка рецептов автора, например когда у него стало меньше
+    подписчиков, чем порог рассылки.
+    """
+    insert_feed_entries('author_id = %s', [author_id], '1 = 1', [])
+    trim_feeds(FOLLOWERS_CONDITION, [author_id])
+
+
+def add_author_to_feed(user_id, author_id):
+    """Рецепты автора в ленте нового подписчика."""
+    insert_feed_entries(
+        'author_id = %s', [author_id], 'follow.user_id = %s', [user_id]
+    )
+    trim_feeds('user_id = %s', [user_id])
+
+
+def remove_author_from_feed(user_id, author):
+    """Удаление рецептов автора из ленты после отписки.
+
+    Вызывается после уменьшения счетчика подписчиков; author содержит
+    прежнее значение. Если автор опустился ниже порога, его рецепты,
+    опубликованные без рассылки, дописываются в ленты подписчиков.
+    Обрезанные раньше записи других авторов не возвращаются до
+    пересборки лент (rebuild_feeds).
+    """
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author.id
+    ).delete()
+    if author.followers_count == FEED_FANOUT_MAX_FOLLOWERS:
+        fan_out_author(author.id)
+
+
+def rebuild_feeds():
+    """Пересборка лент всех пользователей из подписок."""
+    FeedEntry.objects.all().delete()
+    insert_feed_entries('1 = 1', [], '1 = 1', [])
+    trim_feeds('1 = 1', [])
+
+
+def filter_before(queryset, before, id_field):
+    """Позиции старше курсора (pub_date, id)."""
+    if before is None:
+        return queryset
+    pub_date, id = before
+    return queryset.filter(
+        Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, **{id_field: id})
+    )
+
+
+def get_recipe_positions(author_ids, before, limit):
+    """Позиции (pub_date, id) рецептов авторов, от новых к старым."""
+    recipes = filter_before(
+        Recipe.objects.filter(author_id__in=author_ids), before, 'id__lt'
+    )
+    return list(
+        recipes.order_by('-pub_date', '-id').values_list('pub_date', 'id')[
+            :limit
+        ]
+    )
+
+
+def get_pulled_authors(user):
+    """Авторы подписок без рассылки, их рецепты читаются из базы."""
+    return list(Follow.objects.filter(
+        user=user,
+        following__followers_count__gte=FEED_FANOUT_MAX_FOLLOWERS,
+    ).values_list('following_id', flat=True))
+
+
+def get_feed_positions(user, before, limit):
+    """Позиции рецептов ленты пользователя, от новых к старым.
+
+    Сливает записи ленты с рецептами авторов без рассылки.
+    """
+    entries = filter_before(
+        FeedEntry.objects.filter(user=user), before, 'recipe_id__lt'
+    )
+    sources = [list(
+        entries.order_by('-pub_date', '-recipe_id').values_list(
+            'pub_date', 'recipe_id'
+        )[:limit]
+    )]
+    pulled = get_pulled_authors(user)
+    if pulled:
+        sources.append(get_recipe_positions(pulled, before, limit))
+    positions, seen = [], set()
+    for position in heapq.merge(*sources, reverse=True):
+        if position[1] not in seen:
+            seen.add(position[1])
+            positions.append(position)
+            if len(positions) == limit:
+                break
+    return positions
@@ -0,0 +1,116 @@
+import binascii
+from base64 import b64decode
+from tempfile import SpooledTemporaryFile
+from uuid import uuid4
+
+from django.core.files import File
+from PIL import Image
+from rest_framework import serializers
+
+from users.constants import (
+    IMAGE_FORMATS,
+    IMAGE_MAX_BYTES,
+    IMAGE_MAX_PIXELS,
+    IMAGE_MAX_SIDE,
+)
+
+DECODE_CHUNK_SIZE = 64 * 1024
+
+SPOOL_MAX_SIZE = 1024 * 1024
+
+WHITESPACE = (' ', '\n', '\r', '\t')
+
+
+class Base64ImageField(serializers.ImageField):
+    """Изображение в base64 с ограничением размера и числа пикселей.
+
+    Строка декодируется порциями во временный файл, который остается в
+    памяти только до SPOOL_MAX_SIZE. Размеры (число пикселей и длина
+    каждой стороны) проверяются по заголовку
+    до декодирования пикселей, поэтому слишком большие изображения и
+    декомпрессионные бомбы отклоняются сразу.
+    """
+
+    default_error_messages = {
+        'invalid_image': 'Загрузите корректное изображение в base64.',
+        'max_bytes': (
+            'Размер изображения не должен превышать {max_bytes} байт.'
+        ),
+        'max_pixels': (
+            'Изображение не должно содержать больше {max_pixels} пикселей.'
+        ),
+        'max_side': (
+            'Ширина и высота изображения не должны превышать '
+            '{max_side} пикселей.'
+        ),
+    }
+
+    def __init__(self, max_bytes=IMAGE_MAX_BYTES,
+                 max_pixels=IMAGE_MAX_PIXELS, max_side=IMAGE_MAX_SIDE,
+                 **kwargs):
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.max_side = max_side
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid_image')
+        offset = 0
+        if data.startswith('data:') and ';base64,' in data:
+            offset = data.index(';base64,') + len(';base64,')
+        length = len(data) - offset - sum(
+            data.count(space, offset) for space in WHITESPACE
+        )
+        if length * 3 // 4 > self.max_bytes:
+            self.fail('max_bytes', max_bytes=self.max_bytes)
+        file = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        try:
+            for chunk in self.decode_chunks(data, offset):
+                file.write(chunk)
+            file.seek(0)
+            image_format = self.check_image(file)
+        except (binascii.Error, ValueError):
+            file.close()
+            self.fail('invalid_image')
+        except serializers.ValidationError:
+            file.close()
+            raise
+        file.seek(0)
+        return File(file, name=f'{uuid4()}.{image_format.lower()}')
+
+    @staticmethod
+    def decode_chunks(data, offset):
+        """Декодирование порциями с пропуском переносов строк и пробелов.
+
+        Многие клиенты переносят base64 по 76 символов. Пробельные
+        символы удаляются из каждой порции, а остаток, не кратный четырем
+        символам, переносится в следующую.
+        """
+        rest = ''
+        for start in range(offset, len(data), DECODE_CHUNK_SIZE):
+            chunk = rest + ''.join(
+                data[start:start + DECODE_CHUNK_SIZE].split()
+            )
+            end = len(chunk) - len(chunk) % 4
+            rest = chunk[end:]
+            yield b64decode(chunk[:end], validate=True)
+        if rest:
+            yield b64decode(rest, validate=True)
+
+    def check_image(self, file):
+        """Проверка формата и размеров по заголовку изображения."""
+        try:
+            with Image.open(file) as image:
+                if image.format not in IMAGE_FORMATS:
+                    self.fail('invalid_image')
+                if image.width * image.height > self.max_pixels:
+                    self.fail('max_pixels', max_pixels=self.max_pixels)
+                if max(image.size) > self.max_side:
+                    self.fail('max_side', max_side=self.max_side)
+                image.verify()
+                return image.format
+        except Image.DecompressionBombError:
+            self.fail('max_pixels', max_pixels=self.max_pixels)
+        except (OSError, SyntaxError):
+            self.fail('invalid_image')
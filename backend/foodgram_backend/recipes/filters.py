@@ -2,6 +2,21 @@ from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
 from recipes.models import Recipe, Tag
+from recipes.search import search_recipes
+
+TAGS_MODE_ANY = 'any'
+
+TAGS_MODE_ALL = 'all'
+
+ORDERINGS = (
+    ('popular', 'Популярные'),
+    ('trending', 'Набирающие популярность'),
+)
+
+TAGS_MODES = (
+    (TAGS_MODE_ANY, 'Любой из тегов'),
+    (TAGS_MODE_ALL, 'Все теги'),
+)
 
 
 class IngredientsSearch(SearchFilter):
@@ -17,22 +32,67 @@ class RecipeFilter(FilterSet):
         field_name='tags__slug',
         to_field_name='slug',
         queryset=Tag.objects.all(),
+        method='filter_tags',
+    )
+    tags_mode = filters.ChoiceFilter(
+        choices=TAGS_MODES, empty_label=None, method='filter_tags_mode'
     )
     is_in_shopping_cart = filters.NumberFilter(
         method='filter_is_in_shopping_cart')
     is_favorited = filters.NumberFilter(
         method='filter_is_favorited')
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.ChoiceFilter(
+        choices=ORDERINGS, method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = (
+            'tags',
+            'author',
+            'is_favorited',
+            'is_in_shopping_cart',
+            'search',
+            'ordering',
+        )
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        return queryset.with_tags(
+            [tag.id for tag in value],
+            match_all=self.form.cleaned_data.get('tags_mode') == TAGS_MODE_ALL
+        )
+
+    def filter_tags_mode(self, queryset, name, value):
+        """Режим применяется в filter_tags."""
+        return queryset
 
     def filter_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
-            return queryset.filter(shopping_carts__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        if value.strip():
+            return search_recipes(queryset, value)
         return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        """Порядок по таблице рейтингов, которую обновляет update_rankings.
+
+        Строка рейтинга есть у каждого рецепта, поэтому соединение
+        внутреннее и порядок читается по индексу рейтинга. Сортировка по
+        recipe_id, а не recipe: иначе Django присоединяет рецепт еще раз
+        и сортирует по его Meta.ordering.
+        """
+        score = f'ranking__{value}_score'
+        return queryset.filter(ranking__isnull=False).order_by(
+            f'-{score}', '-ranking__recipe_id'
+        )
@@ -0,0 +1,114 @@
+import logging
+from io import BytesIO
+from pathlib import PurePosixPath
+from queue import Queue
+from threading import Lock, Thread
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+from users.constants import RENDITION_QUALITY, RENDITION_WIDTHS
+
+logger = logging.getLogger(__name__)
+
+# Копии лежат рядом с оригиналами: в docker compose том media подключен
+# только к каталогу изображений рецептов, и nginx раздает только его.
+RENDITIONS_DIR = 'recipes/images/renditions'
+
+RENDITION_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+_queue = Queue()
+_worker_lock = Lock()
+_worker = None
+
+
+def get_rendition_size(image, width):
+    """Размер копии, вписанной в квадрат width x width без увеличения."""
+    scale = min(1, width / image.width, width / image.height)
+    return (
+        max(1, round(image.width * scale)),
+        max(1, round(image.height * scale)),
+    )
+
+
+def build_renditions(recipe_id):
+    """Уменьшенные копии изображения рецепта в WebP и JPEG.
+
+    Копия для каждой ширины из RENDITION_WIDTHS вписывается в квадрат
+    этой ширины, поэтому у высоких изображений ограничена и высота.
+    Ключи копий всегда совпадают с RENDITION_WIDTHS: если изображение
+    меньше квадрата, под ключом лежит ближайшая копия того же размера.
+    Копии сохраняются без метаданных.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    with recipe.image.open('rb') as file:
+        with Image.open(file) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    stem = PurePosixPath(recipe.image.name).stem
+    renditions = {}
+    files_by_size = {}
+    for width in RENDITION_WIDTHS:
+        size = get_rendition_size(image, width)
+        if size not in files_by_size:
+            resized = image.resize(size, Image.LANCZOS)
+            files = {}
+            for extension, image_format in RENDITION_FORMATS.items():
+                buffer = BytesIO()
+                resized.save(
+                    buffer, image_format, quality=RENDITION_QUALITY,
+                    optimize=True
+                )
+                name = f'{RENDITIONS_DIR}/{stem}_{width}.{extension}'
+                if default_storage.exists(name):
+                    default_storage.delete(name)
+                files[extension] = default_storage.save(
+                    name, ContentFile(buffer.getvalue())
+                )
+            files_by_size[size] = files
+        renditions[str(width)] = files_by_size[size]
+    Recipe.objects.filter(pk=recipe_id, image=recipe.image.name).update(
+        image_renditions=renditions
+    )
+
+
+def _work():
+    while True:
+        recipe_id = _queue.get()
+        try:
+            build_renditions(recipe_id)
+        except Exception:
+            logger.exception('Не удалось обработать изображение %s', recipe_id)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def _enqueue(recipe_id):
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = Thread(
+                target=_work, name='image-renditions', daemon=True
+            )
+            _worker.start()
+    _queue.put(recipe_id)
+
+
+def schedule_renditions(recipe_id):
+    """Обработка изображения в фоновом потоке после коммита транзакции."""
+    transaction.on_commit(lambda: _enqueue(recipe_id))
+
+
+def get_rendition_urls(recipe, request):
+    return {
+        width: {
+            extension: request.build_absolute_uri(default_storage.url(name))
+            for extension, name in files.items()
+        }
+        for width, files in recipe.image_renditions.items()
+    }
@@ -0,0 +1,70 @@
+from bisect import bisect_left
+from threading import Lock
+
+from recipes.models import Ingredient
+from recipes.versions import (
+    INGREDIENTS_VERSION, bump_content_version, get_content_version
+)
+from users.constants import INGREDIENT_SEARCH_LIMIT
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти воркера для поиска по названию.
+
+    Индекс строится при первом запросе и перестраивается, когда меняется
+    версия ингредиентов: её обновляют сигналы модели и invalidate().
+    Версия хранится в общем кеше, поэтому изменения из management-команд
+    и других воркеров видны всем процессам. Копия индекса своя у каждого
+    воркера, но справочник ингредиентов небольшой и меняется редко.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._keys = None
+        self._items = None
+
+    def invalidate(self):
+        bump_content_version(INGREDIENTS_VERSION)
+
+    def _get_entries(self):
+        version = get_content_version(INGREDIENTS_VERSION)
+        with self._lock:
+            if self._keys is None or self._version != version:
+                entries = sorted(
+                    (name.casefold(), id, name, measurement_unit)
+                    for id, name, measurement_unit
+                    in Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit'
+                    ).iterator()
+                )
+                self._keys = [entry[0] for entry in entries]
+                self._items = [
+                    {'id': id, 'name': name, 'measurement_unit': unit}
+                    for _, id, name, unit in entries
+                ]
+                self._version = version
+            return self._keys, self._items
+
+    def search(self, query, limit=INGREDIENT_SEARCH_LIMIT):
+        """Сначала совпадения по началу названия, затем по подстроке."""
+        keys, items = self._get_entries()
+        query = query.casefold()
+        start = bisect_left(keys, query)
+        end = start
+        while (
+            end < len(keys) and end - start < limit
+            and keys[end].startswith(query)
+        ):
+            end += 1
+        results = items[start:end]
+        if len(results) < limit:
+            for key, item in zip(keys, items):
+                if query in key and not key.startswith(query):
+                    results.append(item)
+                    if len(results) == limit:
+                        break
+        return results
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,169 @@
+import json
+from collections import Counter
+from statistics import mean, quantiles
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Follow, User
+
+PERCENTILES = (50, 95, 99)
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs a fixed set of API requests in process and reports latency "
+        "percentiles and query counts as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of measured requests for each scenario',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=20,
+            help='Number of requests before measuring each scenario',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='User id, by default the user following most authors',
+        )
+        parser.add_argument(
+            '--scenario',
+            action='append',
+            help='Run only the named scenario, may be repeated',
+        )
+        parser.add_argument('--output', help='Write the report to a file')
+
+    def get_scenarios(self):
+        recipe = Recipe.objects.order_by('-favorites_count', 'id').first()
+        tag = Tag.objects.order_by('id').first()
+        ingredient = Ingredient.objects.order_by('id').first()
+        if recipe is None or tag is None or ingredient is None:
+            raise CommandError('No data, run generate_data first')
+        return {
+            'recipes_list': '/api/recipes/',
+            'recipes_by_tag': f'/api/recipes/?tags={tag.slug}',
+            'recipes_favorited': '/api/recipes/?is_favorited=1',
+            'recipes_cursor': '/api/recipes/?pagination=cursor',
+            'recipes_popular': '/api/recipes/?ordering=popular',
+            'recipe_detail': f'/api/recipes/{recipe.id}/',
+            'recipe_similar': f'/api/recipes/{recipe.id}/similar/',
+            'feed': '/api/recipes/feed/',
+            'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+            'ingredient_search': (
+                f'/api/ingredients/?name={ingredient.name[:2]}'
+            ),
+            'download_shopping_cart': '/api/recipes/download_shopping_cart/',
+            'me': '/api/users/me/',
+        }
+
+    def request(self, client, url):
+        """Запрос с чтением всего тела: запросы к базе потокового ответа
+        выполняются и считаются в метриках во время чтения.
+        """
+        start = perf_counter()
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        elapsed = (perf_counter() - start) * 1000
+        return response, elapsed
+
+    def run_scenario(self, client, url, requests, warmup):
+        for _ in range(warmup):
+            self.request(client, url)
+        timings = []
+        queries = []
+        statuses = Counter()
+        start = perf_counter()
+        for _ in range(requests):
+            response, elapsed = self.request(client, url)
+            timings.append(elapsed)
+            queries.append(response.wsgi_request.metrics.queries)
+            statuses[response.status_code] += 1
+        total = perf_counter() - start
+        cuts = quantiles(timings, n=100)
+        return {
+            'url': url,
+            'requests': requests,
+            **{
+                f'p{percentile}_ms': round(cuts[percentile - 1], 3)
+                for percentile in PERCENTILES
+            },
+            'mean_ms': round(mean(timings), 3),
+            'throughput_rps': round(requests / total, 1),
+            'queries': max(queries),
+            'statuses': {
+                str(status): count for status, count in statuses.items()
+            },
+        }
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2')
+        users = User.objects.annotate(follows=Count('follow'))
+        if options['user'] is not None:
+            users = users.filter(pk=options['user'])
+        user = users.order_by('-follows', 'id').first()
+        if user is None:
+            raise CommandError('User not found')
+        scenarios = self.get_scenarios()
+        if options['scenario']:
+            unknown = set(options['scenario']) - scenarios.keys()
+            if unknown:
+                raise CommandError(
+                    f'Unknown scenarios: {", ".join(sorted(unknown))}'
+                )
+            scenarios = {
+                name: url for name, url in scenarios.items()
+                if name in options['scenario']
+            }
+        client = APIClient()
+        client.force_authenticate(user)
+        results = {}
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            for name, url in scenarios.items():
+                results[name] = self.run_scenario(
+                    client, url, options['requests'], options['warmup']
+                )
+                self.stderr.write(
+                    f'{name:<24}p50 {results[name]["p50_ms"]:>9.2f} ms  '
+                    f'p99 {results[name]["p99_ms"]:>9.2f} ms  '
+                    f'queries {results[name]["queries"]}'
+                )
+        report = {
+            'meta': {
+                'database': connection.vendor,
+                'user': user.pk,
+                'warmup': options['warmup'],
+                'rows': {
+                    model.__name__: model.objects.count()
+                    for model in (
+                        User, Recipe, Ingredient, Tag,
+                        Follow, Favorite, ShoppingCart,
+                    )
+                },
+            },
+            'scenarios': results,
+        }
+        report = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+        else:
+            self.stdout.write(report)
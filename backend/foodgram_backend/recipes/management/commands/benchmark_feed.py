@@ -0,0 +1,69 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Count
+
+from recipes.feeds import get_feed_positions
+from recipes.models import Recipe
+from users.constants import PAGE_SIZE
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Measures the subscription feed against a plain join query"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='User id, by default the user following most authors',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Number of runs for each measurement',
+        )
+
+    def measure(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            function()
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings)
+
+    def handle(self, *args, **options):
+        users = User.objects.annotate(follows=Count('follow'))
+        if options['user'] is not None:
+            users = users.filter(pk=options['user'])
+        user = users.order_by('-follows').first()
+        if user is None:
+            raise CommandError('User not found')
+        repeat = options['repeat']
+        positions = get_feed_positions(user, None, PAGE_SIZE + 1)
+        cursor = positions[PAGE_SIZE - 1] if positions else None
+        timings = {
+            'join query': self.measure(
+                lambda: list(Recipe.objects.filter(
+                    author__following__user=user
+                ).order_by('-pub_date', '-id').values_list(
+                    'pub_date', 'id'
+                )[:PAGE_SIZE + 1]),
+                repeat
+            ),
+            'feed': self.measure(
+                lambda: get_feed_positions(user, None, PAGE_SIZE + 1),
+                repeat
+            ),
+            'feed, next page': self.measure(
+                lambda: get_feed_positions(user, cursor, PAGE_SIZE + 1),
+                repeat
+            ),
+        }
+        self.stdout.write(
+            f'user {user.pk}, following {user.follows} authors'
+        )
+        for name, ms in timings.items():
+            self.stdout.write(f'{name:<20}{ms:>10.2f} ms')
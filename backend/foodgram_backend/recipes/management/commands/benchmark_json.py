@@ -0,0 +1,109 @@
+import io
+import json
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from recipes.models import Recipe
+from recipes.renderers import ORJSONParser, ORJSONRenderer, orjson
+from recipes.serializers import GetRecipeSerializer
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the stdlib and orjson renderers and parsers on pages "
+        "of GetRecipeSerializer data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=50,
+            help='Number of recipes on a page',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=50,
+            help='Number of runs for each measurement',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            help='User id for is_favorited and is_subscribed fields',
+        )
+
+    def measure(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            function()
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings)
+
+    def get_page(self, user, page_size):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = user
+        recipes = list(
+            Recipe.objects.with_related().with_user_flags(user)[:page_size]
+        )
+        if not recipes:
+            raise CommandError('No recipes, run generate_data first')
+        context = {
+            'request': request,
+            'subscriptions': set(
+                user.follow.values_list('following_id', flat=True)
+            ),
+        }
+        return GetRecipeSerializer(recipes, many=True, context=context).data
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed')
+        users = User.objects.order_by('id')
+        if options['user'] is not None:
+            users = users.filter(pk=options['user'])
+        user = users.first()
+        if user is None:
+            raise CommandError('User not found')
+        repeat = options['repeat']
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']
+        ):
+            page = self.get_page(user, options['page_size'])
+        results = {}
+        for name, renderer, parser in (
+            ('stdlib json', JSONRenderer(), JSONParser()),
+            ('orjson', ORJSONRenderer(), ORJSONParser()),
+        ):
+            content = renderer.render(page)
+            results[name] = (
+                content,
+                self.measure(lambda: renderer.render(page), repeat),
+                self.measure(
+                    lambda: parser.parse(io.BytesIO(content)), repeat
+                ),
+            )
+        if json.loads(results['orjson'][0]) != json.loads(
+            results['stdlib json'][0]
+        ):
+            raise CommandError('Renderers produced different documents')
+        self.stdout.write(
+            f'{len(page)} recipes, '
+            f'{len(results["stdlib json"][0]) / 1024:.1f} KiB per page'
+        )
+        for name, (content, render, parse) in results.items():
+            self.stdout.write(
+                f'{name:<14}render {render:>8.3f} ms '
+                f'({1000 / render:>8.0f} pages/s)  '
+                f'parse {parse:>8.3f} ms'
+            )
@@ -0,0 +1,50 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management import BaseCommand
+
+from recipes.models import Recipe, Tag
+from users.constants import PAGE_SIZE
+
+
+class Command(BaseCommand):
+    help = "Measures tag filtering on the recipe list for 1-10 tags"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Number of runs for each number of tags',
+        )
+
+    def measure(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = perf_counter()
+            list(queryset[:PAGE_SIZE].values_list('id', flat=True))
+            timings.append((perf_counter() - start) * 1000)
+        return median(timings)
+
+    def handle(self, *args, **options):
+        tag_ids = list(Tag.objects.values_list('id', flat=True)[:10])
+        if not tag_ids:
+            self.stdout.write(self.style.WARNING('No tags to filter by'))
+            return
+        recipes = Recipe.objects.order_by('-pub_date', '-id')
+        self.stdout.write(
+            'tags  join+distinct ms   exists any ms   exists all ms'
+        )
+        for count in range(1, len(tag_ids) + 1):
+            ids = tag_ids[:count]
+            joined = recipes.filter(tags__id__in=ids).distinct()
+            timings = (
+                self.measure(joined, options['repeat']),
+                self.measure(recipes.with_tags(ids), options['repeat']),
+                self.measure(
+                    recipes.with_tags(ids, match_all=True), options['repeat']
+                ),
+            )
+            self.stdout.write(
+                f'{count:>4}' + ''.join(f'{ms:>16.2f}' for ms in timings)
+            )
@@ -0,0 +1,26 @@
+from django.core.management import BaseCommand
+from tqdm import tqdm
+
+from recipes.images import build_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Builds missing image renditions for recipes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Rebuild renditions for every recipe',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.all()
+        if not options['all']:
+            recipes = recipes.filter(image_renditions={})
+        for recipe_id in tqdm(
+            recipes.values_list('id', flat=True).iterator(),
+            ncols=80, ascii=True, desc='Total'
+        ):
+            build_renditions(recipe_id)
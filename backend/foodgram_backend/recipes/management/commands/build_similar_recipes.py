@@ -0,0 +1,25 @@
+from django.core.management import BaseCommand
+
+from recipes.similarity import build_similar_recipes
+from users.constants import SIMILAR_RECIPES_LIMIT
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds similar recipes from co-favorites, ingredients and tags, "
+        "meant to be run on a schedule"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=SIMILAR_RECIPES_LIMIT,
+            help='Number of similar recipes stored for each recipe',
+        )
+
+    def handle(self, *args, **options):
+        created = build_similar_recipes(options['limit'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Similar recipes rebuilt, {created} pairs stored'
+        ))
@@ -0,0 +1,212 @@
+import io
+import random
+from bisect import bisect
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import BaseCommand, CommandError, call_command
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from recipes.feeds import rebuild_feeds
+from recipes.models import (
+    Favorite, Ingredient, IngredientRecipe, Recipe, ShoppingCart, Tag
+)
+from recipes.rankings import update_rankings
+from recipes.search import update_search_vectors
+from users.models import Follow, User
+
+BATCH_SIZE = 1000
+
+IMAGE_NAME = 'recipes/images/benchmark.jpg'
+
+PASSWORD = 'benchmark'
+
+
+class ZipfSampler:
+    """Выбор элементов с вероятностью, обратной степени их ранга."""
+
+    def __init__(self, items, exponent, rng):
+        self.items = items
+        self.rng = rng
+        self.weights = list(accumulate(
+            1 / rank ** exponent for rank in range(1, len(items) + 1)
+        ))
+
+    def sample(self, count, exclude=None):
+        """Не более count разных элементов, кроме exclude."""
+        count = min(count, len(self.items) - (exclude is not None))
+        chosen = set()
+        while len(chosen) < count:
+            item = self.items[bisect(
+                self.weights, self.rng.random() * self.weights[-1]
+            ) if self.weights[-1] else 0]
+            if item != exclude:
+                chosen.add(item)
+        return chosen
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a reproducible synthetic dataset on top of the loaded "
+        "ingredients and tags"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes-per-user', type=int, default=5)
+        parser.add_argument('--favorites-per-user', type=int, default=20)
+        parser.add_argument('--follows-per-user', type=int, default=10)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument(
+            '--zipf-exponent',
+            type=float,
+            default=1.1,
+            help='Skew of favorites, follows and carts towards popular items',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--prefix',
+            default='bench',
+            help='Username prefix of generated users',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete users generated earlier with the same prefix',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+        tag_ids = list(Tag.objects.order_by('id').values_list('id', flat=True))
+        if not ingredient_ids or not tag_ids:
+            raise CommandError('Load ingredients and tags with load_csv_data')
+        generated = User.objects.filter(username__startswith=f'{prefix}_')
+        if generated.exists():
+            if not options['clear']:
+                raise CommandError(
+                    f'Users with prefix "{prefix}" exist, use --clear'
+                )
+            generated.delete()
+        with transaction.atomic():
+            user_ids = self.create_users(prefix, options['users'])
+            recipe_ids = self.create_recipes(
+                rng, user_ids, ingredient_ids, tag_ids, options
+            )
+            self.create_relations(rng, user_ids, recipe_ids, options)
+        call_command('reconcile_counters', stdout=io.StringIO())
+        call_command('rebuild_shopping_lists', stdout=io.StringIO())
+        update_search_vectors()
+        update_rankings()
+        rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(user_ids)} users and {len(recipe_ids)} recipes'
+        ))
+
+    def create_users(self, prefix, count):
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f'{prefix}_{number}',
+                    email=f'{prefix}_{number}@example.com',
+                    first_name='Bench',
+                    last_name=str(number),
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=BATCH_SIZE
+        )
+        return list(User.objects.filter(
+            username__startswith=f'{prefix}_'
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, rng, user_ids, ingredient_ids, tag_ids, options):
+        if not default_storage.exists(IMAGE_NAME):
+            image = io.BytesIO()
+            Image.new('RGB', (640, 480), (200, 120, 60)).save(image, 'JPEG')
+            default_storage.save(IMAGE_NAME, ContentFile(image.getvalue()))
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=user_id,
+                    name=f'Рецепт {user_id}-{number}',
+                    image=IMAGE_NAME,
+                    text='Синтетический рецепт для нагрузочных тестов.',
+                    cooking_time=rng.randint(5, 180),
+                )
+                for user_id in user_ids
+                for number in range(options['recipes_per_user'])
+            ),
+            batch_size=BATCH_SIZE
+        )
+        recipes = list(Recipe.objects.filter(
+            author_id__in=user_ids
+        ).order_by('id').only('id'))
+        now = timezone.now()
+        for recipe in recipes:
+            recipe.pub_date = now - timedelta(
+                seconds=rng.randint(0, 365 * 24 * 60 * 60)
+            )
+        Recipe.objects.bulk_update(recipes, ['pub_date'], BATCH_SIZE)
+        recipe_ids = [recipe.id for recipe in recipes]
+        ingredients = ZipfSampler(
+            ingredient_ids, options['zipf_exponent'], rng
+        )
+        IngredientRecipe.objects.bulk_create(
+            (
+                IngredientRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in ingredients.sample(rng.randint(3, 12))
+            ),
+            batch_size=BATCH_SIZE
+        )
+        Recipe.tags.through.objects.bulk_create(
+            (
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in rng.sample(
+                    tag_ids, rng.randint(1, min(3, len(tag_ids)))
+                )
+            ),
+            batch_size=BATCH_SIZE
+        )
+        return recipe_ids
+
+    def create_relations(self, rng, user_ids, recipe_ids, options):
+        exponent = options['zipf_exponent']
+        recipes = ZipfSampler(
+            rng.sample(recipe_ids, len(recipe_ids)), exponent, rng
+        )
+        authors = ZipfSampler(
+            rng.sample(user_ids, len(user_ids)), exponent, rng
+        )
+        for model, sampler, count, field in (
+            (Favorite, recipes, options['favorites_per_user'], 'recipe_id'),
+            (ShoppingCart, recipes, options['cart_per_user'], 'recipe_id'),
+            (Follow, authors, options['follows_per_user'], 'following_id'),
+        ):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user_id, **{field: item})
+                    for user_id in user_ids
+                    for item in sampler.sample(
+                        count,
+                        exclude=user_id if model is Follow else None
+                    )
+                ),
+                batch_size=BATCH_SIZE
+            )
@@ -1,30 +1,124 @@
 import csv
-from django.core.management import BaseCommand
+import json
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
 from tqdm import tqdm
 
+from recipes.indexes import ingredient_index
 from recipes.models import Ingredient, Tag
+from recipes.versions import TAGS_VERSION, bump_content_version
+
+DATA_DIR = Path(settings.BASE_DIR) / 'data'
+
+BATCH_SIZE = 1000
+
+READ_SIZE = 64 * 1024
+
+SEPARATORS = ' \t\n\r,'
+
+
+def read_csv(path, fields):
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.reader(file):
+            if row:
+                yield dict(zip(fields, row))
+
+
+def read_json(path, fields):
+    """Потоковое чтение JSON-массива объектов без загрузки файла целиком.
+
+    Разбор идет по позиции в буфере, разобранная часть отбрасывается
+    только при дочитывании новой порции.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as file:
+        buffer = file.read(READ_SIZE).lstrip()
+        if not buffer.startswith('['):
+            raise CommandError(f'{path}: ожидается JSON-массив')
+        position = 1
+        while True:
+            while position < len(buffer) and buffer[position] in SEPARATORS:
+                position += 1
+            if buffer.startswith(']', position):
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                chunk = file.read(READ_SIZE)
+                if not chunk:
+                    raise CommandError(f'{path}: некорректный JSON')
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            yield {field: item[field] for field in fields}
+
+
+def read_rows(path, fields):
+    if Path(path).suffix == '.json':
+        return read_json(path, fields)
+    return read_csv(path, fields)
 
 
 class Command(BaseCommand):
-    help = "Loads data from csv files"
+    help = "Loads ingredients and tags from csv or json files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=DATA_DIR / 'ingredients.csv',
+            help='Path to ingredients csv or json file',
+        )
+        parser.add_argument(
+            '--tags',
+            default=DATA_DIR / 'tags.csv',
+            help='Path to tags csv or json file',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of rows inserted per query',
+        )
 
     def handle(self, *args, **options):
-        for row in tqdm(
-            (csv.reader(open(
-                'data/ingredients.csv', encoding='utf-8'
-            ))), ncols=80, ascii=True, desc='Total'
-        ):
-            ingredient = Ingredient(
-                name=row[0], measurement_unit=row[1]
+        with transaction.atomic():
+            self.load(
+                Ingredient, options['ingredients'],
+                ('name', 'measurement_unit'), options['batch_size']
             )
-            ingredient.save()
-
-        for row in tqdm(
-            (csv.reader(open(
-                'data/tags.csv', encoding='utf-8'
-            ))), ncols=80, ascii=True, desc='Total'
-        ):
-            tag = Tag(
-                name=row[0], color=row[1], slug=row[2]
+            self.load(
+                Tag, options['tags'],
+                ('name', 'color', 'slug'), options['batch_size']
             )
-            tag.save()
+        ingredient_index.invalidate()
+        bump_content_version(TAGS_VERSION)
+
+    def load(self, model, path, fields, batch_size):
+        """Вставка порциями, уже существующие строки пропускаются."""
+        start = perf_counter()
+        count_before = model.objects.count()
+        progress = tqdm(
+            read_rows(path, fields), ncols=80, ascii=True,
+            desc=str(model._meta.verbose_name_plural)
+        )
+        rows = iter(progress)
+        total = 0
+        while True:
+            batch = [model(**row) for row in islice(rows, batch_size)]
+            if not batch:
+                break
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        progress.close()
+        elapsed = perf_counter() - start
+        created = model.objects.count() - count_before
+        self.stdout.write(
+            f'{model.__name__}: {total} rows read, {created} created, '
+            f'{total - created} skipped in {elapsed:.2f}s '
+            f'({total / elapsed if elapsed else 0:.0f} rows/s)'
+        )
@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from recipes.feeds import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = "Rebuilds subscription feeds of all users from their follows"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rebuild_feeds()
+        self.stdout.write(self.style.SUCCESS('Feeds rebuilt'))
@@ -0,0 +1,11 @@
+from django.core.management import BaseCommand
+
+from recipes.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = "Rebuilds full-text search vectors of all recipes"
+
+    def handle(self, *args, **options):
+        update_search_vectors()
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
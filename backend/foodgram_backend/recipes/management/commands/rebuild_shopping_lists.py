@@ -0,0 +1,70 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import IngredientRecipe, ShoppingListIngredient
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Rebuilds precomputed shopping lists and reports drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report drift without fixing it',
+        )
+
+    def handle(self, *args, **options):
+        expected = {
+            (total['recipe__shopping_carts__user'], total['ingredient']):
+                total['total_amount']
+            for total in IngredientRecipe.objects.filter(
+                recipe__shopping_carts__isnull=False
+            ).values(
+                'recipe__shopping_carts__user', 'ingredient'
+            ).annotate(
+                total_amount=Sum('amount')
+            ).order_by().iterator()
+        }
+        actual = {
+            (item.user_id, item.ingredient_id): item
+            for item in ShoppingListIngredient.objects.only(
+                'user', 'ingredient', 'amount'
+            ).iterator()
+        }
+        missing = expected.keys() - actual.keys()
+        extra = actual.keys() - expected.keys()
+        changed = [
+            actual[key] for key in expected.keys() & actual.keys()
+            if actual[key].amount != expected[key]
+        ]
+        self.stdout.write(
+            f'Missing: {len(missing)}, extra: {len(extra)}, '
+            f'changed: {len(changed)}'
+        )
+        if options['dry_run'] or not (missing or extra or changed):
+            return
+        with transaction.atomic():
+            ShoppingListIngredient.objects.filter(
+                id__in=[actual[key].id for key in extra]
+            ).delete()
+            for item in changed:
+                item.amount = expected[(item.user_id, item.ingredient_id)]
+            ShoppingListIngredient.objects.bulk_update(
+                changed, ['amount'], batch_size=BATCH_SIZE
+            )
+            ShoppingListIngredient.objects.bulk_create(
+                [
+                    ShoppingListIngredient(
+                        user_id=user,
+                        ingredient_id=ingredient,
+                        amount=expected[(user, ingredient)],
+                    )
+                    for user, ingredient in missing
+                ],
+                batch_size=BATCH_SIZE
+            )
+        self.stdout.write(self.style.SUCCESS('Shopping lists rebuilt'))
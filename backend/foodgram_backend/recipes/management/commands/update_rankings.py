@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from recipes.rankings import update_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculates popular and trending recipe scores, "
+        "meant to be run on a schedule"
+    )
+
+    def handle(self, *args, **options):
+        ranked = update_rankings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rankings updated, {ranked} recipes with recent activity'
+        ))
@@ -0,0 +1,199 @@
+import logging
+from collections import defaultdict
+from threading import Lock
+from time import perf_counter
+
+from django.db import connection
+
+from users.constants import METRICS_LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetrics:
+    """Запросы к базе и время обработки одного HTTP запроса."""
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.endpoint = None
+        self.budget = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка выполнения SQL для connection.execute_wrapper()."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.queries > self.budget
+
+    def get_server_timing(self, total, detailed):
+        """Общее время, а авторизованным клиентам и время по этапам с
+        числом запросов к базе.
+        """
+        timings = [f'total;dur={total * 1000:.1f}']
+        if detailed:
+            timings[:0] = (
+                f'db;dur={self.db_time * 1000:.1f};'
+                f'desc="{self.queries} queries"',
+                f'serialize;dur={self.serialize_time * 1000:.1f}',
+                f'render;dur={self.render_time * 1000:.1f}',
+            )
+        return ', '.join(timings)
+
+
+class MetricsRegistry:
+    """Накопленные метрики эндпоинтов в памяти процесса."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._requests = defaultdict(int)
+        self._sums = defaultdict(float)
+        self._buckets = defaultdict(int)
+
+    def record(self, metrics, method, status, total):
+        endpoint = metrics.endpoint
+        with self._lock:
+            self._requests[(endpoint, method, status)] += 1
+            for name, value in (
+                ('queries', metrics.queries),
+                ('db', metrics.db_time),
+                ('serialize', metrics.serialize_time),
+                ('render', metrics.render_time),
+                ('total', total),
+            ):
+                self._sums[(name, endpoint)] += value
+            for bucket in METRICS_LATENCY_BUCKETS:
+                if total <= bucket:
+                    self._buckets[(endpoint, bucket)] += 1
+            if metrics.over_budget:
+                self._sums[('budget_exceeded', endpoint)] += 1
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self._lock:
+            requests = dict(self._requests)
+            sums = dict(self._sums)
+            buckets = dict(self._buckets)
+        lines = [
+            '# HELP foodgram_requests_total Handled requests.',
+            '# TYPE foodgram_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(
+                f'foodgram_requests_total{{endpoint="{endpoint}",'
+                f'method="{method}",status="{status}"}} {count}'
+            )
+        for name, metric, help_text in (
+            ('queries', 'foodgram_db_queries_total', 'SQL queries.'),
+            ('db', 'foodgram_db_seconds_total', 'Time in SQL queries.'),
+            (
+                'serialize', 'foodgram_serialize_seconds_total',
+                'Time in view code outside SQL queries.'
+            ),
+            (
+                'render', 'foodgram_render_seconds_total',
+                'Time rendering responses.'
+            ),
+            (
+                'budget_exceeded', 'foodgram_query_budget_exceeded_total',
+                'Requests over the query budget.'
+            ),
+        ):
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for (sum_name, endpoint), value in sorted(sums.items()):
+                if sum_name == name:
+                    lines.append(
+                        f'{metric}{{endpoint="{endpoint}"}} {value:g}'
+                    )
+        metric = 'foodgram_request_duration_seconds'
+        lines.append(f'# HELP {metric} Request latency.')
+        lines.append(f'# TYPE {metric} histogram')
+        endpoints = sorted({endpoint for _, endpoint in sums})
+        for endpoint in endpoints:
+            count = sum(
+                count for (name, _, _), count in requests.items()
+                if name == endpoint
+            )
+            for bucket in METRICS_LATENCY_BUCKETS:
+                lines.append(
+                    f'{metric}_bucket{{endpoint="{endpoint}",le="{bucket}"}} '
+                    f'{buckets.get((endpoint, bucket), 0)}'
+                )
+            lines.append(
+                f'{metric}_bucket{{endpoint="{endpoint}",le="+Inf"}} {count}'
+            )
+            lines.append(
+                f'{metric}_sum{{endpoint="{endpoint}"}} '
+                f'{sums[("total", endpoint)]:g}'
+            )
+            lines.append(f'{metric}_count{{endpoint="{endpoint}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """Число запросов к базе и время ответа каждого эндпоинта.
+
+    Пишет заголовок Server-Timing и накапливает метрики для /api/metrics/.
+    Превышение бюджета запросов, объявленного в MetricsMixin, только
+    пишется в лог и считается в метриках: ответ к этому моменту уже
+    сформирован, а изменения сохранены. Бюджеты проверяют тесты через
+    recipes.tests.utils.QueryBudgetClient.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        if metrics.endpoint is None:
+            match = request.resolver_match
+            metrics.endpoint = match.view_name if match else 'unresolved'
+        user = getattr(request, 'user', None)
+        response['Server-Timing'] = metrics.get_server_timing(
+            perf_counter() - metrics.start,
+            user is not None and user.is_authenticated
+        )
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, metrics
+            )
+        else:
+            self.record(request, response, metrics)
+        return response
+
+    def stream(self, content, request, response, metrics):
+        """Потоковый ответ выполняет запросы при чтении: они считаются
+        до конца потока, а метрики записываются после него. Server-Timing
+        к этому моменту уже отправлен и содержит время до начала потока.
+        """
+        try:
+            with connection.execute_wrapper(metrics):
+                yield from content
+        finally:
+            self.record(request, response, metrics)
+
+    def record(self, request, response, metrics):
+        total = perf_counter() - metrics.start
+        registry.record(
+            metrics, request.method, response.status_code, total
+        )
+        if metrics.over_budget:
+            logger.warning(
+                '%s: %s queries, budget %s',
+                metrics.endpoint, metrics.queries, metrics.budget
+            )
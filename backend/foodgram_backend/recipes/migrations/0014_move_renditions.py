@@ -0,0 +1,22 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:40
+
+from django.db import migrations
+
+
+def clear_renditions(apps, schema_editor):
+    """Копии из recipes/renditions не попадали в том media, после
+    миграции их пересоздает команда build_renditions.
+    """
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.exclude(image_renditions={}).update(image_renditions={})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_renditions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:20
+
+from django.db import migrations
+
+FEED_TIMELINE_LIMIT = 500
+
+
+def trim_feeds(apps, schema_editor):
+    """Миграция 0013 переносила в ленты все рецепты авторов."""
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+    table = FeedEntry._meta.db_table
+    schema_editor.execute(
+        f'''
+        DELETE FROM {table} WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id
+                    ORDER BY pub_date DESC, recipe_id DESC
+                ) AS position
+                FROM {table}
+            ) AS entry
+            WHERE entry.position > %s
+        )
+        ''',
+        [FEED_TIMELINE_LIMIT]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipe_ingredients_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(trim_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+from hashlib import md5
+from time import perf_counter
+
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.versions import get_content_version
+from users.constants import REFERENCE_CACHE_MAX_AGE, REFERENCE_CACHE_TIMEOUT
+
+
+class VersionedCacheMixin:
+    """Кеширование list и retrieve по версии содержимого.
+
+    Сериализованные данные хранятся в кеше под текущей версией, ETag
+    строится из нее же, поэтому If-None-Match отвечает 304 без запросов
+    к базе.
+    """
+
+    content_version_name = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request, super().retrieve, *args, **kwargs
+        )
+
+    def get_cached_response(self, request, get_response, *args, **kwargs):
+        version = get_content_version(self.content_version_name)
+        etag = (
+            f'"{self.content_version_name}-{version}-'
+            f'{request.accepted_renderer.format}"'
+        )
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            path = md5(request.get_full_path().encode()).hexdigest()
+            key = f'{self.content_version_name}:{version}:{path}'
+            data = cache.get(key)
+            if data is None:
+                data = get_response(request, *args, **kwargs).data
+                cache.set(key, data, timeout=REFERENCE_CACHE_TIMEOUT)
+            response = Response(data)
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=REFERENCE_CACHE_MAX_AGE
+        )
+        return response
+
+
+class MetricsMixin:
+    """Имя эндпоинта, время сериализации и бюджет запросов для метрик.
+
+    query_budgets - наибольшее число SQL запросов по действию, а у
+    APIView по HTTP методу в нижнем регистре. Метрики собирает
+    recipes.metrics.MetricsMiddleware.
+    """
+
+    query_budgets = {}
+
+    def initial(self, request, *args, **kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            name = getattr(self, 'action', None) or request.method.lower()
+            metrics.endpoint = f'{self.__class__.__name__}.{name}'
+            metrics.budget = self.query_budgets.get(name)
+        super().initial(request, *args, **kwargs)
+        if metrics is not None:
+            self.handler_start = (perf_counter(), metrics.db_time)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None:
+            return response
+        if hasattr(self, 'handler_start'):
+            start, db_time = self.handler_start
+            metrics.serialize_time = (
+                perf_counter() - start - (metrics.db_time - db_time)
+            )
+        if isinstance(response, Response):
+            start = perf_counter()
+            response.render()
+            metrics.render_time = perf_counter() - start
+        return response
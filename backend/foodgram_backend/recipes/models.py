@@ -1,9 +1,25 @@
 from colorfield.fields import ColorField
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Prefetch,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 
 from users.constants import (
-    LETTER_LIMIT, MIN_VALUE, RECIPES_MAX_LENGTH
+    COOKABLE_MAX_MISSING, LETTER_LIMIT, MIN_VALUE, RECIPES_MAX_LENGTH
 )
 from users.models import User
 
@@ -50,6 +66,142 @@ class Ingredient(models.Model):
         return self.name[:LETTER_LIMIT]
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet модели Recipe."""
+
+    @staticmethod
+    def get_prefetches():
+        """Prefetch тегов и ингредиентов для GetRecipeSerializer."""
+        return (
+            'tags',
+            Prefetch(
+                'ingredient_recipes',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                ).only(
+                    'amount',
+                    'recipe',
+                    'ingredient__name',
+                    'ingredient__measurement_unit',
+                ),
+            ),
+        )
+
+    def with_related(self):
+        """Автор, теги и ингредиенты без N+1 запросов."""
+        return self.select_related('author').only(
+            'pub_date',
+            'name',
+            'image',
+            'image_renditions',
+            'text',
+            'cooking_time',
+            'author__email',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+        ).prefetch_related(*self.get_prefetches())
+
+    def latest_per_author(self, limit):
+        """Не более limit последних рецептов каждого автора.
+
+        ROW_NUMBER() по автору считается во вложенном запросе, так как
+        фильтровать по оконной функции напрямую ORM не умеет.
+        """
+        ranked = self.order_by().annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=F('author'),
+                order_by=(F('pub_date').desc(), F('id').desc()),
+            )
+        ).values('id', 'row_number')
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(id__in=RawSQL(
+            f'SELECT id FROM ({sql}) AS ranked WHERE row_number <= %s',
+            (*params, limit)
+        ))
+
+    def with_tags(self, tag_ids, match_all=False):
+        """Рецепты с любым (или со всеми) из тегов.
+
+        Фильтр через EXISTS по промежуточной таблице не размножает строки
+        рецептов, поэтому не нужен DISTINCT и сохраняется порядок по
+        индексу.
+        """
+        recipe_tags = self.model.tags.through.objects.filter(
+            recipe_id=OuterRef('pk')
+        )
+        if not match_all:
+            return self.filter(Exists(recipe_tags.filter(tag_id__in=tag_ids)))
+        return self.filter(*(
+            Exists(recipe_tags.filter(tag_id=tag_id))
+            for tag_id in set(tag_ids)
+        ))
+
+    def cookable(
+        self, ingredient_ids, tags=None, cooking_time=None,
+        max_missing=COOKABLE_MAX_MISSING
+    ):
+        """Рецепты хотя бы с одним из ингредиентов, по числу недостающих.
+
+        Совпадения считаются группировкой строк IngredientRecipe, отобранных
+        по индексу (ingredient, recipe), поэтому затрагиваются только
+        рецепты с нужными ингредиентами. Недостающие ингредиенты - разница
+        с сохраненным Recipe.ingredients_count, рецепты, где их больше
+        max_missing, отсекаются в HAVING.
+        """
+        queryset = self.filter(
+            ingredient_recipes__ingredient_id__in=set(ingredient_ids)
+        )
+        if tags:
+            queryset = queryset.filter(Exists(
+                self.model.tags.through.objects.filter(
+                    recipe_id=OuterRef('pk'), tag__slug__in=tags
+                )
+            ))
+        if cooking_time is not None:
+            queryset = queryset.filter(cooking_time__lte=cooking_time)
+        return queryset.annotate(
+            matched_count=Count(
+                'ingredient_recipes__ingredient', distinct=True
+            ),
+            missing_count=ExpressionWrapper(
+                F('ingredients_count') - F('matched_count'),
+                output_field=models.IntegerField()
+            ),
+        ).filter(missing_count__lte=max_missing).order_by(
+            'missing_count', '-matched_count', '-id'
+        )
+
+    def lock(self):
+        """Блокировка строк рецептов до конца транзакции.
+
+        Строки блокируются по порядку id, возвращаются id найденных
+        рецептов. Под блокировкой изменения ингредиентов рецепта и
+        списков покупок с ним выполняются по очереди, и дельты
+        ShoppingListIngredient считаются по актуальным данным.
+        """
+        return set(self.select_for_update().order_by('id').values_list(
+            'id', flat=True
+        ))
+
+    def with_user_flags(self, user):
+        """Аннотация is_favorited и is_in_shopping_cart."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
+
+
 class Recipe(models.Model):
     """Модель рецепта."""
 
@@ -63,6 +215,9 @@ class Recipe(models.Model):
         upload_to='recipes/images/',
         verbose_name='Изображение'
     )
+    image_renditions = models.JSONField(
+        'Уменьшенные копии изображения', default=dict, blank=True
+    )
     text = models.TextField('Описание рецепта')
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -74,12 +229,31 @@ class Recipe(models.Model):
         validators=[MinValueValidator(MIN_VALUE)]
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    search_vector = SearchVectorField(
+        'Поисковый вектор', null=True, editable=False
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлений в избранное', default=0
+    )
+    carts_count = models.PositiveIntegerField(
+        'Добавлений в список покупок', default=0
+    )
+    ingredients_count = models.PositiveSmallIntegerField(
+        'Число ингредиентов', default=0
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         default_related_name = 'recipes'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='recipe_pub_date_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name[:LETTER_LIMIT]
@@ -91,6 +265,7 @@ class IngredientRecipe(models.Model):
     ingredient = models.ForeignKey(
         Ingredient,
         on_delete=models.CASCADE,
+        db_index=False,
         verbose_name='Ингредиент',
     )
     amount = models.PositiveSmallIntegerField(
@@ -107,6 +282,13 @@ class IngredientRecipe(models.Model):
         default_related_name = 'ingredient_recipes'
         verbose_name = 'Ингредиент для рецепта'
         verbose_name_plural = 'Ингредиенты для рецепта'
+        # Индекс начинается с ingredient и заменяет индекс внешнего ключа.
+        indexes = [
+            models.Index(
+                fields=['ingredient', 'recipe'],
+                name='ingredient_recipe_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.ingredient} - {self.recipe}'[:LETTER_LIMIT]
@@ -125,6 +307,10 @@ class Favorite(models.Model):
         on_delete=models.CASCADE
     )
 
+    created = models.DateTimeField(
+        'Дата добавления', auto_now_add=True, db_index=True
+    )
+
     class Meta:
         ordering = ['user']
         verbose_name = 'Избранное'
@@ -154,6 +340,10 @@ class ShoppingCart(models.Model):
         on_delete=models.CASCADE
     )
 
+    created = models.DateTimeField(
+        'Дата добавления', auto_now_add=True, db_index=True
+    )
+
     class Meta:
         ordering = ['user']
         verbose_name = 'Список покупок'
@@ -167,3 +357,210 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} - {self.recipe}'[:LETTER_LIMIT]
+
+
+class ShoppingListIngredientQuerySet(models.QuerySet):
+    """QuerySet модели ShoppingListIngredient."""
+
+    @staticmethod
+    def get_recipe_amounts(recipe_id):
+        """Количество каждого ингредиента в рецепте."""
+        return ShoppingListIngredientQuerySet.get_recipes_amounts(
+            [recipe_id]
+        )
+
+    @staticmethod
+    def get_recipes_amounts(recipe_ids):
+        """Суммарное количество каждого ингредиента в рецептах."""
+        return dict(
+            IngredientRecipe.objects.filter(recipe_id__in=recipe_ids).values(
+                'ingredient'
+            ).annotate(
+                total_amount=Sum('amount')
+            ).values_list('ingredient', 'total_amount')
+        )
+
+    def change_amounts(self, user_ids, amounts):
+        """Изменение количества ингредиентов в списках покупок на дельты."""
+        amounts = {
+            ingredient: amount
+            for ingredient, amount in amounts.items() if amount
+        }
+        if not user_ids or not amounts:
+            return
+        with transaction.atomic(savepoint=False):
+            self.bulk_create(
+                [
+                    self.model(user_id=user, ingredient_id=ingredient)
+                    for user in user_ids for ingredient in amounts
+                ],
+                ignore_conflicts=True
+            )
+            items = self.filter(
+                user_id__in=user_ids, ingredient_id__in=amounts
+            )
+            items.update(amount=F('amount') + Case(
+                *(
+                    When(ingredient_id=ingredient, then=Value(amount))
+                    for ingredient, amount in amounts.items()
+                ),
+                output_field=models.IntegerField()
+            ))
+            items.filter(amount__lte=0).delete()
+
+    def add_recipe(self, user_ids, recipe_id):
+        """Добавление ингредиентов рецепта в списки покупок."""
+        self.add_recipes(user_ids, [recipe_id])
+
+    def remove_recipe(self, user_ids, recipe_id):
+        """Удаление ингредиентов рецепта из списков покупок."""
+        self.remove_recipes(user_ids, [recipe_id])
+
+    def add_recipes(self, user_ids, recipe_ids):
+        """Добавление ингредиентов нескольких рецептов в списки покупок."""
+        self.change_amounts(user_ids, self.get_recipes_amounts(recipe_ids))
+
+    def remove_recipes(self, user_ids, recipe_ids):
+        """Удаление ингредиентов нескольких рецептов из списков покупок."""
+        self.change_amounts(user_ids, {
+            ingredient: -amount
+            for ingredient, amount in self.get_recipes_amounts(
+                recipe_ids
+            ).items()
+        })
+
+
+class ShoppingListIngredient(models.Model):
+    """Модель суммарного количества ингредиента в списке покупок."""
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        verbose_name='Ингредиент',
+        on_delete=models.CASCADE
+    )
+    amount = models.IntegerField('Колличество', default=0)
+
+    objects = ShoppingListIngredientQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['user']
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Ингредиенты списков покупок'
+        default_related_name = 'shopping_list_ingredients'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_list_ingredient'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.ingredient}'[:LETTER_LIMIT]
+
+
+class RecipeRanking(models.Model):
+    """Рейтинги рецепта, рассчитанные командой update_rankings."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Рецепт',
+    )
+    popular_score = models.FloatField('Популярность', default=0)
+    trending_score = models.FloatField('Набирает популярность', default=0)
+    updated = models.DateTimeField('Дата расчета')
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=['-popular_score', '-recipe'],
+                name='ranking_popular_idx'
+            ),
+            models.Index(
+                fields=['-trending_score', '-recipe'],
+                name='ranking_trending_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.popular_score:.2f}'
+
+
+class SimilarRecipe(models.Model):
+    """Похожий рецепт, найденный командой build_similar_recipes."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'], name='unique_similar_recipe'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['recipe', '-score'], name='similar_recipe_score_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id} - {self.similar_id}'
+
+
+class FeedEntry(models.Model):
+    """Рецепт в ленте подписчика, записанный при публикации."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_entry_user_pub_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} - {self.recipe_id}'
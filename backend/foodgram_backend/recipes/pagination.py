@@ -1,8 +1,175 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-from users.constants import PAGE_SIZE, PAGE_SIZE_QUERY_PARAM
+from recipes.feeds import get_feed_positions
+from users.constants import (
+    COUNT_QUERY_PARAM,
+    CURSOR_QUERY_PARAM,
+    FEED_TIMELINE_LIMIT,
+    PAGE_SIZE,
+    PAGE_SIZE_QUERY_PARAM,
+    PAGINATION_QUERY_PARAM,
+)
 
 
 class Pagination(PageNumberPagination):
     page_size_query_param = PAGE_SIZE_QUERY_PARAM
     page_size = PAGE_SIZE
+
+
+class RecipePagination(Pagination):
+    """Пагинация по номеру страницы или по курсору (pub_date, id).
+
+    Курсор включается параметром pagination=cursor, страницы без COUNT и
+    OFFSET. Курсор строится по (pub_date, id), поэтому с другим порядком
+    (ordering, search) он не сочетается. С параметром count=approximate
+    в ответ добавляется оценка количества рецептов планировщиком.
+    """
+
+    cursor_query_param = CURSOR_QUERY_PARAM
+    cursor_size = 2
+    invalid_cursor_message = 'Неверный курсор'
+    cursor_ordering_message = (
+        'Курсорная пагинация доступна только при сортировке по дате '
+        'публикации'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = (
+            request.query_params.get(PAGINATION_QUERY_PARAM) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        if queryset.query.order_by:
+            raise ValidationError(
+                {PAGINATION_QUERY_PARAM: self.cursor_ordering_message}
+            )
+        self.request = request
+        self.count = None
+        if request.query_params.get(COUNT_QUERY_PARAM) == 'approximate':
+            self.count = self.get_approximate_count(queryset)
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by('-pub_date', '-id')
+        position = self.decode_cursor(request)
+        if position is not None:
+            pub_date, id = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=id)
+            )
+        page = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_position = (page[-1].pub_date, page[-1].id)
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        response = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            response['count'] = self.count
+        return Response(response)
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param,
+            self.encode_cursor(*self.next_position)
+        )
+
+    def encode_cursor(self, pub_date, *numbers):
+        return urlsafe_b64encode('|'.join(
+            (pub_date.isoformat(), *map(str, numbers))
+        ).encode()).decode()
+
+    def decode_cursor(self, request):
+        """Позиция (pub_date, id) из курсора, у ленты с числом уже
+        показанных рецептов.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, *numbers = urlsafe_b64decode(
+                encoded.encode()
+            ).decode().split('|')
+            pub_date = parse_datetime(pub_date)
+            numbers = [int(number) for number in numbers]
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None or len(numbers) != self.cursor_size - 1:
+            raise NotFound(self.invalid_cursor_message)
+        return (pub_date, *numbers)
+
+    def get_approximate_count(self, queryset):
+        """Оценка числа строк из плана запроса PostgreSQL.
+
+        EXPLAIN не выполняет запрос, а берет оценку из статистики таблиц
+        (reltuples и селективность условий). На других базах, где такой
+        оценки нет, считается точный COUNT.
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return queryset.count()
+        try:
+            sql, params = queryset.order_by().values(
+                'pk'
+            ).query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class FeedPagination(RecipePagination):
+    """Курсорная пагинация ленты подписок.
+
+    Лента хранит не больше FEED_TIMELINE_LIMIT рецептов, поэтому курсор
+    содержит число уже показанных рецептов и страницы на пределе
+    заканчиваются.
+    """
+
+    cursor_size = 3
+
+    def paginate_feed(self, user, request):
+        """Позиции (pub_date, id) рецептов страницы ленты."""
+        self.use_cursor = True
+        self.request = request
+        self.count = None
+        cursor = self.decode_cursor(request)
+        before, shown = (None, 0) if cursor is None else (
+            cursor[:2], cursor[2]
+        )
+        self.next_position = None
+        page_size = min(
+            self.get_page_size(request), FEED_TIMELINE_LIMIT - shown
+        )
+        if page_size <= 0:
+            return []
+        positions = get_feed_positions(user, before, page_size + 1)
+        if len(positions) > page_size:
+            positions = positions[:page_size]
+            if shown + page_size < FEED_TIMELINE_LIMIT:
+                self.next_position = (*positions[-1], shown + page_size)
+        return positions
@@ -1,3 +1,6 @@
+from secrets import compare_digest
+
+from django.conf import settings
 from rest_framework import permissions
 
 
@@ -9,3 +12,13 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             request.method in permissions.SAFE_METHODS
             or request.user == obj.author
         )
+
+
+class IsMetricsScraper(permissions.BasePermission):
+    """Администратор или сборщик метрик с токеном METRICS_TOKEN."""
+
+    def has_permission(self, request, view):
+        token = settings.METRICS_TOKEN
+        return request.user.is_staff or bool(token) and compare_digest(
+            request.headers.get('Authorization', ''), f'Bearer {token}'
+        )
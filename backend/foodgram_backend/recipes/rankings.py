@@ -0,0 +1,86 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, RecipeRanking, ShoppingCart
+from users.constants import (
+    FAVORITE_SCORE,
+    POPULAR_HALF_LIFE_DAYS,
+    POPULAR_WINDOW_DAYS,
+    RANKING_BATCH_SIZE,
+    SHOPPING_CART_SCORE,
+    TRENDING_HALF_LIFE_DAYS,
+    TRENDING_WINDOW_DAYS,
+)
+
+RANKINGS = (
+    ('popular_score', POPULAR_HALF_LIFE_DAYS, POPULAR_WINDOW_DAYS),
+    ('trending_score', TRENDING_HALF_LIFE_DAYS, TRENDING_WINDOW_DAYS),
+)
+
+EVENTS = (
+    (Favorite, FAVORITE_SCORE),
+    (ShoppingCart, SHOPPING_CART_SCORE),
+)
+
+
+def compute_scores(now):
+    """Сумма весов добавлений в избранное и списки покупок по рецептам.
+
+    Вес добавления уменьшается вдвое за каждый период полураспада и не
+    учитывается за пределами окна рейтинга.
+    """
+    rankings = [
+        (
+            field,
+            timedelta(days=half_life).total_seconds(),
+            timedelta(days=window).total_seconds(),
+        )
+        for field, half_life, window in RANKINGS
+    ]
+    since = now - timedelta(days=max(window for *_, window in RANKINGS))
+    scores = defaultdict(lambda: dict.fromkeys(
+        (field for field, *_ in RANKINGS), 0.0
+    ))
+    for model, weight in EVENTS:
+        for recipe_id, created in model.objects.filter(
+            created__gte=since
+        ).values_list('recipe_id', 'created').iterator():
+            age = max((now - created).total_seconds(), 0)
+            for field, half_life, window in rankings:
+                if age <= window:
+                    scores[recipe_id][field] += weight * 0.5 ** (
+                        age / half_life
+                    )
+    return scores
+
+
+def update_rankings(now=None):
+    """Пересчет таблицы рейтингов, возвращает число рецептов с оценкой."""
+    now = now or timezone.now()
+    scores = compute_scores(now)
+    with transaction.atomic():
+        RecipeRanking.objects.bulk_create(
+            (
+                RecipeRanking(recipe_id=recipe_id, updated=now)
+                for recipe_id in Recipe.objects.filter(
+                    ranking__isnull=True
+                ).values_list('id', flat=True).iterator()
+            ),
+            batch_size=RANKING_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        RecipeRanking.objects.update(
+            popular_score=0, trending_score=0, updated=now
+        )
+        RecipeRanking.objects.bulk_update(
+            [
+                RecipeRanking(recipe_id=recipe_id, updated=now, **fields)
+                for recipe_id, fields in scores.items()
+            ],
+            [field for field, *_ in RANKINGS],
+            batch_size=RANKING_BATCH_SIZE,
+        )
+    return len(scores)
@@ -0,0 +1,85 @@
+import codecs
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENCODER = JSONEncoder()
+
+LINE_SEPARATOR = '\u2028'.encode()
+
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def default(obj):
+    """Типы, которые orjson не сериализует сам, приводятся так же, как в
+    DRF: Decimal к float, ленивые строки к str, timedelta, QuerySet и
+    прочие - через JSONEncoder.
+    """
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    return ENCODER.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson.
+
+    Вывод совпадает с JSONRenderer побайтно: datetime в UTC с суффиксом
+    Z, U+2028 и U+2029 экранируются. Отличие одно: NaN и Infinity
+    выводятся как null, а не вызывают ошибку. Ответы с отступом
+    (indent в Accept или в контексте, например в Browsable API) и
+    окружение без orjson обрабатываются стандартным JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if (
+            orjson is None
+            or self.get_indent(accepted_media_type, renderer_context)
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        ret = orjson.dumps(
+            data,
+            default=default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+        # Разделители строк недопустимы в строках JavaScript, DRF их
+        # экранирует.
+        return ret.replace(LINE_SEPARATOR, b'\\u2028').replace(
+            PARAGRAPH_SEPARATOR, b'\\u2029'
+        )
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser на orjson, без orjson - стандартный JSONParser."""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                data = data.decode(encoding)
+            return orjson.loads(data)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,214 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from threading import Lock
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, connections, transaction
+from django.db.models import Case, F, FloatField, QuerySet, Value, When
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from recipes.versions import (
+    RECIPES_SEARCH_VERSION, bump_content_version, get_content_version
+)
+from users.constants import SEARCH_CONFIG, SEARCH_FALLBACK_LIMIT
+
+NAME_WEIGHT = 1.0
+
+TEXT_WEIGHT = 0.4
+
+INGREDIENT_WEIGHT = 0.2
+
+UPDATE_SEARCH_VECTOR_SQL = f'''
+    UPDATE {Recipe._meta.db_table} AS recipe SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', recipe.name), 'A')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', recipe.text), 'B')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce((
+            SELECT string_agg(ingredient.name, ' ')
+            FROM {IngredientRecipe._meta.db_table} AS ingredient_recipe
+            JOIN {Ingredient._meta.db_table} AS ingredient
+                ON ingredient.id = ingredient_recipe.ingredient_id
+            WHERE ingredient_recipe.recipe_id = recipe.id
+        ), '')), 'C')
+'''
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text.casefold().replace('ё', 'е'))
+
+
+class RecipeSearchIndex:
+    """Инвертированный индекс рецептов в памяти для баз без tsvector.
+
+    Используется вместо полнотекстового поиска PostgreSQL, например при
+    запуске на SQLite. Полностью перестраивается только при смене версии
+    поиска (rebuild_search_index), а изменения отдельных рецептов
+    применяются к индексу своего процесса, поэтому резервный поиск
+    рассчитан на один процесс разработки.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._version = None
+        self._terms = None
+        self._postings = None
+        self._documents = None
+
+    @staticmethod
+    def _load(recipe_ids=None):
+        """Веса слов по рецептам: {id: {слово: вес}}."""
+        documents = defaultdict(lambda: defaultdict(float))
+        recipes = Recipe.objects.values_list('id', 'name', 'text')
+        ingredients = IngredientRecipe.objects.values_list(
+            'recipe_id', 'ingredient__name'
+        )
+        if recipe_ids is not None:
+            recipes = recipes.filter(id__in=recipe_ids)
+            ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        for id, name, text in recipes.iterator():
+            for term in tokenize(name):
+                documents[id][term] += NAME_WEIGHT
+            for term in tokenize(text):
+                documents[id][term] += TEXT_WEIGHT
+        for id, name in ingredients.iterator():
+            if id in documents:
+                for term in tokenize(name):
+                    documents[id][term] += INGREDIENT_WEIGHT
+        return documents
+
+    def _get_index(self):
+        version = get_content_version(RECIPES_SEARCH_VERSION)
+        with self._lock:
+            if self._terms is None or self._version != version:
+                documents = self._load()
+                postings = defaultdict(dict)
+                for id, terms in documents.items():
+                    for term, score in terms.items():
+                        postings[term][id] = score
+                self._documents = dict(documents)
+                self._postings = dict(postings)
+                self._terms = sorted(postings)
+                self._version = version
+            return self._terms, self._postings
+
+    def update(self, recipe_ids):
+        """Переиндексация рецептов; удаленные рецепты убираются."""
+        with self._lock:
+            if self._terms is None:
+                return
+            recipe_ids = set(recipe_ids)
+            for id in recipe_ids:
+                for term in self._documents.pop(id, {}):
+                    del self._postings[term][id]
+                    if not self._postings[term]:
+                        del self._postings[term]
+                        del self._terms[bisect_left(self._terms, term)]
+            for id, terms in self._load(recipe_ids).items():
+                self._documents[id] = terms
+                for term, score in terms.items():
+                    if term not in self._postings:
+                        self._postings[term] = {}
+                        insort(self._terms, term)
+                    self._postings[term][id] = score
+
+    def search(self, query, limit=SEARCH_FALLBACK_LIMIT):
+        """Рецепты, содержащие все слова запроса (как префиксы)."""
+        terms, postings = self._get_index()
+        scores = None
+        for word in tokenize(query):
+            word_scores = defaultdict(float)
+            position = bisect_left(terms, word)
+            while (
+                position < len(terms) and terms[position].startswith(word)
+            ):
+                for id, score in postings[terms[position]].items():
+                    word_scores[id] += score
+                position += 1
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {
+                    id: score + word_scores[id]
+                    for id, score in scores.items() if id in word_scores
+                }
+        if not scores:
+            return []
+        return sorted(
+            scores.items(), key=lambda item: item[1], reverse=True
+        )[:limit]
+
+
+recipe_search_index = RecipeSearchIndex()
+
+
+def update_search_vectors(recipe_ids=None):
+    """Обновление поискового вектора рецептов (всех, если ids не заданы).
+
+    recipe_ids - список id или QuerySet из values_list('..._id').
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            if recipe_ids is None:
+                cursor.execute(UPDATE_SEARCH_VECTOR_SQL)
+            elif isinstance(recipe_ids, QuerySet):
+                sql, params = recipe_ids.query.sql_with_params()
+                cursor.execute(
+                    f'{UPDATE_SEARCH_VECTOR_SQL} WHERE recipe.id IN ({sql})',
+                    params
+                )
+            else:
+                cursor.execute(
+                    f'{UPDATE_SEARCH_VECTOR_SQL} WHERE recipe.id = ANY(%s)',
+                    [list(recipe_ids)]
+                )
+    if recipe_ids is None:
+        bump_content_version(RECIPES_SEARCH_VERSION)
+    else:
+        recipe_search_index.update(recipe_ids)
+
+
+class SearchVectorsUpdate:
+    """Отложенное до коммита обновление векторов набора рецептов."""
+
+    def __init__(self, recipe_ids):
+        self.recipe_ids = set(recipe_ids)
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        update_search_vectors(self.recipe_ids)
+
+
+def schedule_search_update(recipe_ids):
+    """Обновление векторов после коммита, одно на транзакцию.
+
+    Рецепт и его ингредиенты, измененные в одной транзакции (например,
+    в админке), добавляются к уже запланированному обновлению.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        for entry in connection.run_on_commit:
+            if isinstance(entry[1], SearchVectorsUpdate) and not entry[1].done:
+                entry[1].recipe_ids.update(recipe_ids)
+                return
+    transaction.on_commit(SearchVectorsUpdate(recipe_ids))
+
+
+def search_recipes(queryset, value):
+    """Рецепты, найденные по запросу, в порядке релевантности."""
+    if connections[queryset.db].vendor == 'postgresql':
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date')
+    ranked = recipe_search_index.search(value)
+    if not ranked:
+        return queryset.none()
+    return queryset.filter(id__in=[id for id, _ in ranked]).annotate(
+        rank=Case(
+            *(When(id=id, then=Value(score)) for id, score in ranked),
+            output_field=FloatField()
+        )
+    ).order_by('-rank', '-pub_date')
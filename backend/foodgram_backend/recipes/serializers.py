@@ -1,16 +1,41 @@
-from drf_extra_fields.fields import Base64ImageField
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
+from recipes.counters import change_counter
+from recipes.feeds import fan_out_recipe
+from recipes.fields import Base64ImageField
+from recipes.images import get_rendition_urls, schedule_renditions
 from recipes.models import (
     Favorite,
     Ingredient,
     IngredientRecipe,
     Recipe,
+    RecipeRanking,
     ShoppingCart,
+    ShoppingListIngredient,
     Tag,
 )
+from users.constants import BATCH_MAX_RECIPES, COOKABLE_MAX_MISSING
+from users.models import User
 from users.serializers import RecipeForFollowSerializer, UserSerializer
 
+DOES_NOT_EXIST = serializers.PrimaryKeyRelatedField.default_error_messages[
+    'does_not_exist'
+]
+
+
+def set_prefetched(instance, name, objects):
+    """Заполнение кеша prefetch_related уже загруженными объектами."""
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance.__dict__.setdefault('_prefetched_objects_cache', {})[
+        name
+    ] = queryset
+
 
 class IngredientSerializer(serializers.ModelSerializer):
     """Сериализатор модели Ingredient."""
@@ -45,7 +70,7 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
 class AddIngredientSerializer(serializers.ModelSerializer):
     """Сериализатор для добавления ингредиента в рецепт."""
 
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     amount = serializers.IntegerField()
 
     class Meta:
@@ -63,16 +88,21 @@ class AddIngredientSerializer(serializers.ModelSerializer):
 class PostRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для Post запроса модели Recipe."""
 
-    tags = serializers.PrimaryKeyRelatedField(
-        many=True, queryset=Tag.objects.all()
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     ingredients = AddIngredientSerializer(many=True)
     author = UserSerializer(read_only=True)
     image = Base64ImageField()
 
     class Meta:
         model = Recipe
-        exclude = ('pub_date',)
+        exclude = (
+            'pub_date',
+            'search_vector',
+            'favorites_count',
+            'carts_count',
+            'ingredients_count',
+            'image_renditions',
+        )
 
     def add_ingredient(self, obj, ingredients):
         """Добавление игредиентов."""
@@ -84,31 +114,146 @@ class PostRecipeSerializer(serializers.ModelSerializer):
                 amount=ingredient['amount']
             )
             ing_recipes.append(ingredient_recipe)
-        return IngredientRecipe.objects.bulk_create(ing_recipes)
-
+        ing_recipes = IngredientRecipe.objects.bulk_create(ing_recipes)
+        set_prefetched(obj, 'ingredient_recipes', ing_recipes)
+        return ing_recipes
+
+    def set_ingredients(self, obj, ingredients):
+        """Замена игредиентов с записью только изменившихся строк.
+
+        Возвращает изменение количества каждого ингредиента рецепта.
+        """
+        new_ingredients = {
+            ingredient['id'].id: ingredient for ingredient in ingredients
+        }
+        old_amounts = Counter()
+        current = {}
+        stale = []
+        for ingredient_recipe in IngredientRecipe.objects.filter(
+            recipe=obj
+        ).select_related('ingredient').order_by('id'):
+            ingredient_id = ingredient_recipe.ingredient_id
+            old_amounts[ingredient_id] += ingredient_recipe.amount
+            if (
+                ingredient_id in current
+                or ingredient_id not in new_ingredients
+            ):
+                stale.append(ingredient_recipe.id)
+            else:
+                current[ingredient_id] = ingredient_recipe
+        changed = []
+        for ingredient_id, ingredient_recipe in current.items():
+            amount = new_ingredients[ingredient_id]['amount']
+            if ingredient_recipe.amount != amount:
+                ingredient_recipe.amount = amount
+                changed.append(ingredient_recipe)
+        if stale:
+            IngredientRecipe.objects.filter(id__in=stale).delete()
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        created = IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                ingredient=ingredient['id'],
+                recipe=obj,
+                amount=ingredient['amount']
+            )
+            for ingredient_id, ingredient in new_ingredients.items()
+            if ingredient_id not in current
+        )
+        set_prefetched(
+            obj, 'ingredient_recipes', [*current.values(), *created]
+        )
+        obj.ingredients_count = len(new_ingredients)
+        return {
+            ingredient_id: (
+                new_ingredients[ingredient_id]['amount']
+                if ingredient_id in new_ingredients else 0
+            ) - old_amounts[ingredient_id]
+            for ingredient_id in new_ingredients.keys() | old_amounts.keys()
+        }
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop("ingredients")
         tags = validated_data.pop("tags")
         author = self.context.get('request').user
-        recipe = Recipe.objects.create(author=author, **validated_data)
+        recipe = Recipe.objects.create(
+            author=author, ingredients_count=len(ingredients),
+            **validated_data
+        )
         self.add_ingredient(recipe, ingredients)
         recipe.tags.set(tags)
+        set_prefetched(recipe, 'tags', sorted(tags, key=lambda tag: tag.name))
+        recipe.is_favorited = False
+        recipe.is_in_shopping_cart = False
+        RecipeRanking.objects.create(recipe=recipe, updated=recipe.pub_date)
+        fan_out_recipe(recipe)
+        schedule_renditions(recipe.id)
+        change_counter(
+            User.objects.filter(pk=author.pk), 'recipes_count', 1
+        )
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Обновение рецепта."""
+        Recipe.objects.filter(pk=instance.pk).lock()
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
-        instance.ingredients.clear()
-        self.add_ingredient(instance, ingredients)
+        if 'image' in validated_data:
+            validated_data['image_renditions'] = {}
+            schedule_renditions(instance.id)
+        amounts = self.set_ingredients(instance, ingredients)
         instance.tags.set(tags)
-        return super().update(instance, validated_data)
+        set_prefetched(
+            instance, 'tags', sorted(tags, key=lambda tag: tag.name)
+        )
+        ShoppingListIngredient.objects.change_amounts(
+            list(instance.shopping_carts.values_list('user_id', flat=True)),
+            amounts
+        )
+        instance = super().update(instance, validated_data)
+        return instance
 
     def to_representation(self, instance):
+        """Ответ из уже загруженных объектов, без повторных запросов."""
         request = self.context.get('request')
         context = {'request': request}
+        prefetch_related_objects(
+            [instance], *Recipe.objects.get_prefetches()
+        )
         return GetRecipeSerializer(instance, context=context).data
 
+    def validate_ingredients(self, value):
+        """Проверка существования всех ингредиентов одним запросом.
+
+        Ошибки по элементам списка, как у вложенного сериализатора с
+        PrimaryKeyRelatedField.
+        """
+        ingredients = Ingredient.objects.in_bulk(
+            [ingredient['id'] for ingredient in value]
+        )
+        errors = [
+            {} if ingredient['id'] in ingredients
+            else {'id': [DOES_NOT_EXIST.format(pk_value=ingredient['id'])]}
+            for ingredient in value
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors, code='does_not_exist')
+        for ingredient in value:
+            ingredient['id'] = ingredients[ingredient['id']]
+        return value
+
+    def validate_tags(self, value):
+        """Проверка существования всех тегов одним запросом."""
+        tags = Tag.objects.in_bulk(value)
+        for id in value:
+            if id not in tags:
+                raise serializers.ValidationError(
+                    DOES_NOT_EXIST.format(pk_value=id), code='does_not_exist'
+                )
+        return [tags[id] for id in value]
+
     def validate(self, data):
         """Валидация."""
         if 'ingredients' not in data:
@@ -145,13 +290,26 @@ class GetRecipeSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
-        exclude = ('pub_date',)
+        exclude = (
+            'pub_date',
+            'search_vector',
+            'favorites_count',
+            'carts_count',
+            'ingredients_count',
+        )
+
+    def get_image_renditions(self, obj):
+        """Ссылки на уменьшенные копии изображения."""
+        return get_rendition_urls(obj, self.context.get('request'))
 
     def get_is_favorited(self, obj):
         """Проверка того, находится ли рецепт в избранном."""
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         return (
             user.is_authenticated
@@ -160,6 +318,8 @@ class GetRecipeSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """Проверка того, находится ли рецепт в списке покупок."""
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         return (
             user.is_authenticated
@@ -167,6 +327,38 @@ class GetRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class CookableRecipeSerializer(GetRecipeSerializer):
+    """Рецепт с числом имеющихся и недостающих ингредиентов."""
+
+    matched_count = serializers.IntegerField(read_only=True)
+    missing_count = serializers.IntegerField(read_only=True)
+
+
+class CookableQuerySerializer(serializers.Serializer):
+    """Параметры подбора рецептов по имеющимся ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
+    tags = serializers.ListField(
+        child=serializers.SlugField(), required=False
+    )
+    cooking_time = serializers.IntegerField(min_value=1, required=False)
+    max_missing = serializers.IntegerField(
+        min_value=0, default=COOKABLE_MAX_MISSING
+    )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетного изменения."""
+
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_MAX_RECIPES,
+    )
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     """Сериализатор модели Favorite."""
 
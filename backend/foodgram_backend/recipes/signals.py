@@ -0,0 +1,41 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from recipes.search import schedule_search_update, update_search_vectors
+from recipes.versions import (
+    INGREDIENTS_VERSION,
+    TAGS_VERSION,
+    bump_content_version,
+)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def bump_ingredients_version(**kwargs):
+    bump_content_version(INGREDIENTS_VERSION)
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(**kwargs):
+    bump_content_version(TAGS_VERSION)
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_search_vectors(instance, created, **kwargs):
+    """Переименование ингредиента меняет векторы рецептов с ним."""
+    if not created:
+        recipe_ids = IngredientRecipe.objects.filter(
+            ingredient_id=instance.id
+        ).values_list('recipe_id', flat=True)
+        transaction.on_commit(lambda: update_search_vectors(recipe_ids))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def update_recipe_search_vector(instance, **kwargs):
+    schedule_search_update([instance.id])
+
+
+@receiver((post_save, post_delete), sender=IngredientRecipe)
+def update_ingredient_recipe_search_vector(instance, **kwargs):
+    schedule_search_update([instance.recipe_id])
@@ -0,0 +1,109 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.db import transaction
+
+from recipes.models import Favorite, IngredientRecipe, Recipe, SimilarRecipe
+from users.constants import (
+    SIMILAR_BATCH_SIZE,
+    SIMILAR_CONTENT_WEIGHT,
+    SIMILAR_FAVORITE_WEIGHT,
+    SIMILAR_MAX_GROUP_SIZE,
+    SIMILAR_RECIPES_LIMIT,
+)
+
+
+def stream_groups(queryset, key, value):
+    """Значения value, сгруппированные по key, без загрузки всей таблицы."""
+    rows = queryset.order_by(key, value).values_list(key, value).iterator(
+        chunk_size=SIMILAR_BATCH_SIZE
+    )
+    for _, group in groupby(rows, key=itemgetter(0)):
+        yield {recipe_id for _, recipe_id in group}
+
+
+def count_cooccurrences(groups):
+    """Разреженные счетчики: в скольких группах есть рецепт и пара рецептов.
+
+    Группы больше SIMILAR_MAX_GROUP_SIZE (например, пользователь с
+    огромным избранным или ингредиент вроде соли) учитываются только в
+    размерах: пар в них квадратично много, а сходства они почти не дают.
+    """
+    sizes = Counter()
+    pairs = defaultdict(Counter)
+    for recipe_ids in groups:
+        sizes.update(recipe_ids)
+        if len(recipe_ids) > SIMILAR_MAX_GROUP_SIZE:
+            continue
+        recipe_ids = sorted(recipe_ids)
+        for position, recipe_id in enumerate(recipe_ids):
+            for other_id in recipe_ids[position + 1:]:
+                pairs[recipe_id][other_id] += 1
+                pairs[other_id][recipe_id] += 1
+    return sizes, pairs
+
+
+def jaccard(shared, size, other_size):
+    return shared / (size + other_size - shared) if shared else 0.0
+
+
+def compute_similar(limit=SIMILAR_RECIPES_LIMIT):
+    """Не более limit похожих рецептов для каждого рецепта.
+
+    Сходство - взвешенная сумма коэффициентов Жаккара по пользователям,
+    добавившим рецепты в избранное, и по ингредиентам и тегам рецептов.
+    Кандидаты - рецепты с общими избранным или ингредиентами.
+    """
+    favorite_sizes, favorite_pairs = count_cooccurrences(
+        stream_groups(Favorite.objects.all(), 'user_id', 'recipe_id')
+    )
+    ingredient_sizes, ingredient_pairs = count_cooccurrences(
+        stream_groups(
+            IngredientRecipe.objects.all(), 'ingredient_id', 'recipe_id'
+        )
+    )
+    recipe_tags = defaultdict(set)
+    for recipe_id, tag_id in Recipe.tags.through.objects.values_list(
+        'recipe_id', 'tag_id'
+    ).iterator(chunk_size=SIMILAR_BATCH_SIZE):
+        recipe_tags[recipe_id].add(tag_id)
+    for recipe_id in favorite_pairs.keys() | ingredient_pairs.keys():
+        favorites = favorite_pairs.get(recipe_id, {})
+        ingredients = ingredient_pairs.get(recipe_id, {})
+        tags = recipe_tags.get(recipe_id, set())
+        content_size = ingredient_sizes[recipe_id] + len(tags)
+        scores = []
+        for other_id in favorites.keys() | ingredients.keys():
+            other_tags = recipe_tags.get(other_id, set())
+            score = SIMILAR_FAVORITE_WEIGHT * jaccard(
+                favorites.get(other_id, 0),
+                favorite_sizes[recipe_id],
+                favorite_sizes[other_id],
+            ) + SIMILAR_CONTENT_WEIGHT * jaccard(
+                ingredients.get(other_id, 0) + len(tags & other_tags),
+                content_size,
+                ingredient_sizes[other_id] + len(other_tags),
+            )
+            scores.append((score, other_id))
+        yield recipe_id, heapq.nlargest(limit, scores)
+
+
+def build_similar_recipes(limit=SIMILAR_RECIPES_LIMIT):
+    """Пересборка таблицы похожих рецептов, возвращает число строк."""
+    similar = (
+        SimilarRecipe(recipe_id=recipe_id, similar_id=other_id, score=score)
+        for recipe_id, scores in compute_similar(limit)
+        for score, other_id in scores
+    )
+    created = 0
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        while True:
+            batch = list(islice(similar, SIMILAR_BATCH_SIZE))
+            if not batch:
+                break
+            SimilarRecipe.objects.bulk_create(batch)
+            created += len(batch)
+    return created
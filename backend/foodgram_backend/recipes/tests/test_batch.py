@@ -0,0 +1,82 @@
+from unittest import mock
+
+from rest_framework import status
+
+from recipes.counters import change_counter
+from recipes.models import Favorite, Recipe
+from recipes.tests.utils import BudgetAPITestCase
+from recipes.views import lock_user
+from users.models import User
+
+
+class BatchFavoriteTest(BudgetAPITestCase):
+    """Статусы и счетчики считаются по связям, прочитанным после
+    блокировки пользователя.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.other = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name,
+            )
+            for name in ('user', 'other')
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.other, name='Рецепт', text='Текст',
+            image='recipes/images/test.png', cooking_time=10,
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def favorite(self, user, delta):
+        """Изменение избранного параллельным запросом."""
+        if delta > 0:
+            Favorite.objects.create(user=user, recipe=self.recipe)
+        else:
+            Favorite.objects.filter(user=user, recipe=self.recipe).delete()
+        change_counter(
+            Recipe.objects.filter(pk=self.recipe.pk), 'favorites_count', delta
+        )
+
+    def batch(self, method):
+        response = getattr(self.client, method)(
+            '/api/recipes/batch_favorite/',
+            {'recipes': [self.recipe.id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        return response.data['results'][0]['status']
+
+    def concurrent(self, delta):
+        """Параллельный запрос успел до блокировки."""
+        def side_effect(user):
+            self.favorite(user, delta)
+            lock_user(user)
+        return mock.patch('recipes.views.lock_user', side_effect=side_effect)
+
+    def test_concurrent_add(self):
+        with self.concurrent(1):
+            self.assertEqual(self.batch('post'), 'exists')
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_concurrent_delete(self):
+        self.favorite(self.other, 1)
+        self.favorite(self.user, 1)
+        with self.concurrent(-1):
+            self.assertEqual(self.batch('delete'), 'absent')
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+    def test_delete_twice(self):
+        self.favorite(self.other, 1)
+        self.assertEqual(self.batch('post'), 'added')
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
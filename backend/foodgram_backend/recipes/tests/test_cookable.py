@@ -0,0 +1,137 @@
+from django.db import connection
+from rest_framework import status
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from recipes.tests.utils import BudgetAPITestCase
+from users.models import User
+
+
+class CookableTest(BudgetAPITestCase):
+    """Подбор рецептов по имеющимся ингредиентам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass',
+            first_name='Author', last_name='Author',
+        )
+        cls.breakfast = Tag.objects.create(
+            name='Завтрак', color='#000001', slug='breakfast'
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'И{number}', measurement_unit='г')
+            for number in range(4)
+        ]
+        cls.recipes = {}
+        for name, ingredients, cooking_time in (
+            ('all', (0, 1), 10),
+            ('one_missing', (0, 1, 2), 20),
+            ('partial', (0, 2, 3), 30),
+            ('other', (3,), 10),
+        ):
+            recipe = Recipe.objects.create(
+                author=author, name=name, text='Текст',
+                image='recipes/images/test.png', cooking_time=cooking_time,
+                ingredients_count=len(ingredients),
+            )
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=cls.ingredients[number],
+                    amount=1
+                )
+                for number in ingredients
+            )
+            cls.recipes[name] = recipe
+        cls.recipes['one_missing'].tags.add(cls.breakfast)
+
+    def cookable(self, query):
+        response = self.client.get(f'/api/recipes/cookable/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def ingredients_query(self, *numbers):
+        return '&'.join(
+            f'ingredients={self.ingredients[number].id}'
+            for number in numbers
+        )
+
+    def test_ranking(self):
+        data = self.cookable(self.ingredients_query(0, 1))
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(
+            [
+                (recipe['name'], recipe['matched_count'],
+                 recipe['missing_count'])
+                for recipe in data['results']
+            ],
+            [('all', 2, 0), ('one_missing', 2, 1), ('partial', 1, 2)]
+        )
+
+    def test_filters(self):
+        query = self.ingredients_query(0)
+        data = self.cookable(f'{query}&tags=breakfast')
+        self.assertEqual(
+            [recipe['name'] for recipe in data['results']], ['one_missing']
+        )
+        data = self.cookable(f'{query}&cooking_time=20')
+        self.assertEqual(
+            [recipe['name'] for recipe in data['results']],
+            ['all', 'one_missing']
+        )
+
+    def test_pagination(self):
+        data = self.cookable(f'{self.ingredients_query(0, 3)}&limit=2')
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNotNone(data['next'])
+
+    def test_no_matches_and_validation(self):
+        self.assertEqual(self.cookable('ingredients=999999')['count'], 0)
+        response = self.client.get('/api/recipes/cookable/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_max_missing(self):
+        query = self.ingredients_query(0, 1)
+        data = self.cookable(f'{query}&max_missing=0')
+        self.assertEqual(
+            [recipe['name'] for recipe in data['results']], ['all']
+        )
+        data = self.cookable(f'{query}&max_missing=1')
+        self.assertEqual(
+            [recipe['name'] for recipe in data['results']],
+            ['all', 'one_missing']
+        )
+
+    def test_queries_do_not_depend_on_recipes(self):
+        author = User.objects.get(username='author')
+        for number in range(30):
+            recipe = Recipe.objects.create(
+                author=author, name=f'extra {number}', text='Текст',
+                image='recipes/images/test.png', cooking_time=10,
+                ingredients_count=2,
+            )
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in self.ingredients[:2]
+            )
+        query = self.ingredients_query(0, 1)
+        for limit in (2, 20):
+            with self.assertNumQueries(4):
+                data = self.cookable(f'{query}&limit={limit}')
+            self.assertEqual(len(data['results']), limit)
+            self.assertEqual(data['count'], 33)
+
+    def test_query_plan(self):
+        """Совпадения читаются по индексу (ingredient, recipe), а число
+        ингредиентов рецепта - из столбца, без подзапроса по рецепту.
+        """
+        queryset = Recipe.objects.cookable(
+            [ingredient.id for ingredient in self.ingredients[:2]]
+        )
+        self.assertEqual(str(queryset.query).count('SELECT'), 1)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertIn('ingredient_recipe_idx', queryset.explain())
@@ -0,0 +1,148 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from rest_framework import status
+
+from recipes.management.commands.reconcile_counters import (
+    COUNTERS,
+    count_subquery,
+)
+from recipes.models import Ingredient, Recipe, Tag
+from recipes.tests.utils import BudgetAPITestCase, make_image
+from users.models import User
+
+
+class CountersTest(BudgetAPITestCase):
+    """Денормализованные счетчики совпадают с числом связей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, *cls.users = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name,
+            )
+            for name in ('author', 'first', 'second')
+        )
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#000001', slug='breakfast'
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'И{number}', measurement_unit='г')
+            for number in range(2)
+        ]
+
+    def assertCountersMatch(self):
+        """Счетчики совпадают с пересчетом, как в reconcile_counters."""
+        for model, counter, related_model, field in COUNTERS:
+            drifted = model.objects.annotate(
+                actual_count=count_subquery(related_model, field)
+            ).exclude(**{counter: F('actual_count')})
+            self.assertFalse(drifted.exists(), f'{model.__name__}.{counter}')
+
+    def assertCounters(self, obj, **counters):
+        obj.refresh_from_db()
+        self.assertEqual(
+            {counter: getattr(obj, counter) for counter in counters},
+            counters
+        )
+        self.assertCountersMatch()
+
+    def request(self, user, method, url, expected_status, data=None):
+        self.client.force_authenticate(user)
+        response = getattr(self.client, method)(url, data, format='json')
+        self.assertEqual(response.status_code, expected_status)
+        return response
+
+    def create_recipe(self):
+        response = self.request(
+            self.author, 'post', '/api/recipes/', status.HTTP_201_CREATED, {
+                'name': 'Рецепт',
+                'text': 'Текст',
+                'cooking_time': 5,
+                'image': make_image(),
+                'tags': [self.tag.id],
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 1}
+                    for ingredient in self.ingredients
+                ],
+            }
+        )
+        return Recipe.objects.get(pk=response.data['id'])
+
+    def test_subscriptions(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        for user in self.users:
+            self.request(user, 'post', url, status.HTTP_201_CREATED)
+        self.request(self.users[0], 'post', url, status.HTTP_400_BAD_REQUEST)
+        self.assertCounters(self.author, followers_count=2)
+        self.request(self.users[0], 'delete', url, status.HTTP_204_NO_CONTENT)
+        self.request(self.users[0], 'delete', url, status.HTTP_404_NOT_FOUND)
+        self.assertCounters(self.author, followers_count=1)
+
+    def test_recipes(self):
+        recipe = self.create_recipe()
+        other = self.create_recipe()
+        self.assertCounters(self.author, recipes_count=2)
+        self.assertCounters(recipe, ingredients_count=2)
+        self.request(
+            self.author, 'delete', f'/api/recipes/{recipe.id}/',
+            status.HTTP_204_NO_CONTENT
+        )
+        self.assertCounters(self.author, recipes_count=1)
+        self.request(
+            self.author, 'delete', f'/api/recipes/{other.id}/',
+            status.HTTP_204_NO_CONTENT
+        )
+        self.assertCounters(self.author, recipes_count=0)
+
+    def check_relation(self, action, counter):
+        """Одиночные и пакетные добавления и удаления одного рецепта."""
+        recipe = self.create_recipe()
+        first, second = self.users
+        url = f'/api/recipes/{recipe.id}/{action}/'
+        batch_url = f'/api/recipes/batch_{action}/'
+        ids = {'recipes': [recipe.id]}
+        self.request(first, 'post', url, status.HTTP_201_CREATED)
+        self.request(first, 'post', url, status.HTTP_400_BAD_REQUEST)
+        self.request(second, 'post', batch_url, status.HTTP_200_OK, ids)
+        self.request(second, 'post', batch_url, status.HTTP_200_OK, ids)
+        self.assertCounters(recipe, **{counter: 2})
+        self.request(first, 'delete', batch_url, status.HTTP_200_OK, ids)
+        self.request(first, 'delete', url, status.HTTP_400_BAD_REQUEST)
+        self.assertCounters(recipe, **{counter: 1})
+        self.request(second, 'delete', url, status.HTTP_204_NO_CONTENT)
+        self.request(second, 'delete', batch_url, status.HTTP_200_OK, ids)
+        self.assertCounters(recipe, **{counter: 0})
+
+    def test_favorites(self):
+        self.check_relation('favorite', 'favorites_count')
+
+    def test_shopping_carts(self):
+        self.check_relation('shopping_cart', 'carts_count')
+
+    def test_reconcile_repairs_counters(self):
+        recipe = self.create_recipe()
+        self.request(
+            self.users[0], 'post', f'/api/users/{self.author.id}/subscribe/',
+            status.HTTP_201_CREATED
+        )
+        self.request(
+            self.users[0], 'post', f'/api/recipes/{recipe.id}/favorite/',
+            status.HTTP_201_CREATED
+        )
+        User.objects.filter(pk=self.author.pk).update(
+            followers_count=7, recipes_count=0
+        )
+        Recipe.objects.filter(pk=recipe.pk).update(
+            favorites_count=0, ingredients_count=5
+        )
+        output = StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=output)
+        self.assertIn('User.followers_count: 1 drifted', output.getvalue())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 7)
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertCounters(self.author, followers_count=1, recipes_count=1)
+        self.assertCounters(recipe, favorites_count=1, ingredients_count=2)
@@ -0,0 +1,58 @@
+from rest_framework import status
+
+from recipes.models import Ingredient, ShoppingListIngredient
+from recipes.tests.utils import BudgetAPITestCase
+from users.models import User
+
+
+class ShoppingCartExportTest(BudgetAPITestCase):
+    """Выгрузка списка покупок во всех форматах."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='buyer', email='buyer@example.com', password='pass',
+            first_name='Buyer', last_name='Buyer',
+        )
+        ShoppingListIngredient.objects.bulk_create(
+            ShoppingListIngredient(
+                user=cls.user,
+                ingredient=Ingredient.objects.create(
+                    name=f'Ингредиент {number:03}', measurement_unit='г'
+                ),
+                amount=number + 1,
+            )
+            for number in range(120)
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def download(self, file_format):
+        response = self.client.get(
+            f'/api/recipes/download_shopping_cart/?format={file_format}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content)
+
+    def test_txt(self):
+        lines = self.download('txt').decode().split('\n')
+        self.assertEqual(len(lines), 120)
+        self.assertEqual(lines[0], 'Ингредиент 000 1 г')
+
+    def test_csv(self):
+        lines = self.download('csv').decode().splitlines()
+        self.assertEqual(len(lines), 121)
+        self.assertEqual(lines[1], 'Ингредиент 000,1,г')
+
+    def test_pdf(self):
+        content = self.download('pdf')
+        self.assertTrue(content.startswith(b'%PDF'))
+        self.assertTrue(content.rstrip().endswith(b'%%EOF'))
+        self.assertEqual(content.count(b'/Type /Page\n'), 3)
+
+    def test_unknown_format(self):
+        response = self.client.get(
+            '/api/recipes/download_shopping_cart/?format=xlsx'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+from rest_framework import status
+
+from recipes.feeds import fan_out_recipe
+from recipes.models import FeedEntry, Recipe
+from recipes.tests.utils import BudgetAPITestCase
+from users.models import Follow, User
+
+
+class FeedTest(BudgetAPITestCase):
+    """Лента подписок хранится в таблице FeedEntry."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author, cls.other = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name,
+            )
+            for name in ('user', 'author', 'other')
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.now = timezone.now()
+
+    def create_recipe(self, author, minutes_ago):
+        recipe = Recipe.objects.create(
+            author=author, name=f'{author.username} {minutes_ago}',
+            text='Текст', image='recipes/images/test.png', cooking_time=10,
+        )
+        recipe.pub_date = self.now - timedelta(minutes=minutes_ago)
+        recipe.save(update_fields=['pub_date'])
+        fan_out_recipe(recipe)
+        return recipe
+
+    def subscribe(self, author):
+        response = self.client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def feed_ids(self, url='/api/recipes/feed/?limit=2'):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_subscribe_adds_existing_recipes(self):
+        old = self.create_recipe(self.author, 30)
+        self.create_recipe(self.other, 20)
+        self.subscribe(self.author)
+        self.assertEqual(self.feed_ids(), [old.id])
+
+    def test_publish_fans_out_to_followers(self):
+        self.subscribe(self.author)
+        recipes = [self.create_recipe(self.author, 10 - number)
+                   for number in range(5)]
+        self.assertEqual(
+            self.feed_ids(), [recipe.id for recipe in reversed(recipes)]
+        )
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.user).count(), 5
+        )
+
+    def test_unsubscribe_removes_recipes(self):
+        self.subscribe(self.author)
+        self.subscribe(self.other)
+        self.create_recipe(self.author, 20)
+        kept = self.create_recipe(self.other, 10)
+        response = self.client.delete(
+            f'/api/users/{self.author.id}/subscribe/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.feed_ids(), [kept.id])
+
+    @mock.patch('recipes.feeds.FEED_FANOUT_MAX_FOLLOWERS', 2)
+    def test_large_authors_are_merged_on_read(self):
+        self.subscribe(self.author)
+        self.subscribe(self.other)
+        Follow.objects.create(user=self.other, following=self.author)
+        User.objects.filter(pk=self.author.pk).update(followers_count=2)
+        pulled = [self.create_recipe(self.author, minutes)
+                  for minutes in (50, 30, 10)]
+        pushed = [self.create_recipe(self.other, minutes)
+                  for minutes in (40, 20)]
+        self.assertFalse(
+            FeedEntry.objects.filter(recipe__author=self.author).exists()
+        )
+        self.assertEqual(self.feed_ids(), [
+            pulled[2].id, pushed[1].id, pulled[1].id, pushed[0].id,
+            pulled[0].id,
+        ])
+
+    @mock.patch('recipes.pagination.FEED_TIMELINE_LIMIT', 3)
+    @mock.patch('recipes.feeds.FEED_TIMELINE_LIMIT', 3)
+    def test_timeline_is_trimmed(self):
+        old = [self.create_recipe(self.author, minutes)
+               for minutes in (90, 80, 70, 60, 50)]
+        self.subscribe(self.author)
+        self.assertEqual(
+            set(FeedEntry.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )),
+            {recipe.id for recipe in old[2:]}
+        )
+        self.subscribe(self.other)
+        new = [self.create_recipe(self.other, minutes)
+               for minutes in (20, 10)]
+        self.assertEqual(
+            FeedEntry.objects.filter(user=self.user).count(), 3
+        )
+        self.assertEqual(
+            self.feed_ids(), [new[1].id, new[0].id, old[4].id]
+        )
+
+    @mock.patch('recipes.pagination.FEED_TIMELINE_LIMIT', 3)
+    @mock.patch('recipes.feeds.FEED_FANOUT_MAX_FOLLOWERS', 1)
+    def test_pagination_stops_at_limit(self):
+        self.subscribe(self.author)
+        pulled = [self.create_recipe(self.author, minutes)
+                  for minutes in (50, 40, 30, 20, 10)]
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(
+            self.feed_ids(), [recipe.id for recipe in pulled[:1:-1]]
+        )
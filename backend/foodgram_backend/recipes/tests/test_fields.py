@@ -0,0 +1,80 @@
+import base64
+import io
+import os
+import tracemalloc
+
+from django.test import SimpleTestCase
+from PIL import Image
+from rest_framework import serializers
+
+from recipes.fields import SPOOL_MAX_SIZE, Base64ImageField
+
+
+def make_image(size, noise=False):
+    if noise:
+        image = Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+    else:
+        image = Image.new('RGB', size, 'red')
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class Base64ImageFieldTest(SimpleTestCase):
+    """Потоковое декодирование изображений в base64."""
+
+    def setUp(self):
+        self.field = Base64ImageField()
+
+    def decode(self, data):
+        file = self.field.to_internal_value(data)
+        content = file.read()
+        file.close()
+        return content
+
+    def test_plain_and_data_url(self):
+        content = make_image((30, 20))
+        encoded = base64.b64encode(content).decode()
+        self.assertEqual(self.decode(encoded), content)
+        self.assertEqual(
+            self.decode(f'data:image/png;base64,{encoded}'), content
+        )
+
+    def test_wrapped_base64(self):
+        content = make_image((300, 300), noise=True)
+        self.assertEqual(
+            self.decode(base64.encodebytes(content).decode()), content
+        )
+        self.assertEqual(
+            self.decode(base64.encodebytes(content).decode().replace(
+                '\n', '\r\n'
+            )),
+            content
+        )
+
+    def test_invalid_base64(self):
+        for data in ('not base64!', 'QUJD', base64.b64encode(b'text')):
+            with self.assertRaises(serializers.ValidationError):
+                self.field.to_internal_value(data)
+
+    def test_max_bytes(self):
+        field = Base64ImageField(max_bytes=100)
+        with self.assertRaises(serializers.ValidationError):
+            field.to_internal_value(
+                base64.b64encode(make_image((300, 300), noise=True)).decode()
+            )
+
+    def test_memory_is_bounded(self):
+        """Пиковая память декодирования не растет с размером файла."""
+        content = make_image((1200, 1200), noise=True)
+        data = base64.encodebytes(content).decode()
+        del content
+        self.assertGreater(len(data) * 3 // 4, 4 * SPOOL_MAX_SIZE)
+        tracemalloc.start()
+        try:
+            file = self.field.to_internal_value(data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        file.close()
+        self.assertLess(peak, 2 * SPOOL_MAX_SIZE)
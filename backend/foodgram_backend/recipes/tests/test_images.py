@@ -0,0 +1,91 @@
+import base64
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework import serializers
+
+from recipes.fields import Base64ImageField
+from recipes.images import build_renditions
+from recipes.models import Recipe
+from users.constants import RENDITION_WIDTHS
+from users.models import User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(size, image_format='PNG'):
+    image = io.BytesIO()
+    Image.new('RGB', size, 'red').save(image, image_format)
+    return image.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RenditionsTest(TestCase):
+    """Уменьшенные копии изображений рецептов."""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def build(self, size):
+        author, _ = User.objects.get_or_create(
+            username='author', email='author@example.com'
+        )
+        recipe = Recipe(
+            author=author, name='Рецепт', text='Текст', cooking_time=10
+        )
+        recipe.image.save('test.png', ContentFile(make_image(size)))
+        build_renditions(recipe.id)
+        recipe.refresh_from_db()
+        return {
+            width: Image.open(default_storage.open(files['webp'])).size
+            for width, files in recipe.image_renditions.items()
+        }, recipe.image_renditions
+
+    def test_small_image_keeps_canonical_keys(self):
+        sizes, renditions = self.build((200, 100))
+        self.assertEqual(
+            set(renditions), {str(width) for width in RENDITION_WIDTHS}
+        )
+        self.assertEqual(set(sizes.values()), {(200, 100)})
+        self.assertEqual(
+            len({files['webp'] for files in renditions.values()}), 1
+        )
+
+    def test_saved_in_media_volume(self):
+        """Том media в infra/docker-compose*.yml подключен к каталогу
+        изображений рецептов, копии вне его не сохранятся и не раздаются.
+        """
+        volume = Recipe._meta.get_field('image').upload_to
+        _, renditions = self.build((700, 700))
+        for files in renditions.values():
+            for name in files.values():
+                self.assertTrue(name.startswith(volume), name)
+                self.assertTrue(default_storage.exists(name))
+
+    def test_both_dimensions_are_capped(self):
+        sizes, _ = self.build((400, 2000))
+        self.assertEqual(sizes['320'], (64, 320))
+        self.assertEqual(sizes['640'], (128, 640))
+        self.assertEqual(sizes['1280'], (256, 1280))
+        sizes, _ = self.build((3000, 1500))
+        self.assertEqual(sizes['320'], (320, 160))
+        self.assertEqual(sizes['1280'], (1280, 640))
+
+
+class Base64ImageFieldSizeTest(TestCase):
+    """Ограничение сторон загружаемого изображения."""
+
+    def test_max_side(self):
+        field = Base64ImageField(max_side=100)
+        data = base64.b64encode(make_image((101, 10))).decode()
+        with self.assertRaises(serializers.ValidationError):
+            field.to_internal_value(data)
+        data = base64.b64encode(make_image((100, 10))).decode()
+        self.assertTrue(field.to_internal_value(data).name.endswith('.png'))
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.indexes import IngredientIndex
+from recipes.models import Ingredient
+from recipes.tests.utils import BudgetAPITestCase
+from recipes.versions import INGREDIENTS_VERSION, bump_content_version
+
+
+class IngredientIndexTest(TestCase):
+    """Индекс ингредиентов перестраивается после изменений справочника."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+
+    def setUp(self):
+        cache.clear()
+        self.index = IngredientIndex()
+
+    def names(self, query):
+        return [item['name'] for item in self.index.search(query)]
+
+    def test_create_update_delete(self):
+        self.assertEqual(self.names('со'), ['Соль'])
+        sugar = Ingredient.objects.create(name='Сахар', measurement_unit='г')
+        self.assertEqual(self.names('са'), ['Сахар'])
+        sugar.name = 'Сода'
+        sugar.save()
+        self.assertEqual(self.names('с'), ['Сода', 'Соль'])
+        self.assertEqual(self.names('са'), [])
+        sugar.delete()
+        self.assertEqual(self.names('с'), ['Соль'])
+
+    def test_bump_from_other_process(self):
+        """Команды меняют справочник без сигналов и обновляют версию."""
+        self.assertEqual(self.names('соль'), ['Соль'])
+        Ingredient.objects.filter(pk=self.salt.pk).update(name='Перец')
+        other_worker = IngredientIndex()
+        self.assertEqual(self.names('соль'), ['Соль'])
+        bump_content_version(INGREDIENTS_VERSION)
+        self.assertEqual(self.names('соль'), [])
+        self.assertEqual(self.names('пер'), ['Перец'])
+        self.assertEqual(
+            [item['name'] for item in other_worker.search('пер')], ['Перец']
+        )
+
+
+class IngredientSearchViewTest(BudgetAPITestCase):
+    """Кешированный ответ поиска обновляется вместе со справочником."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_ingredient_is_found(self):
+        Ingredient.objects.create(name='Мука', measurement_unit='г')
+        response = self.client.get('/api/ingredients/?name=м')
+        self.assertEqual([item['name'] for item in response.data], ['Мука'])
+        etag = response['ETag']
+        Ingredient.objects.create(name='Мед', measurement_unit='г')
+        response = self.client.get(
+            '/api/ingredients/?name=м', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['name'] for item in response.data], ['Мед', 'Мука']
+        )
@@ -0,0 +1,57 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import CommandError
+from django.test import SimpleTestCase
+
+from recipes.management.commands.load_csv_data import read_json
+
+FIELDS = ('name', 'measurement_unit')
+
+
+class ReadJsonTest(SimpleTestCase):
+    """Потоковое чтение JSON-массива порциями."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'ingredients.json'
+
+    def read(self, text, read_size):
+        self.path.write_text(text, encoding='utf-8')
+        with mock.patch(
+            'recipes.management.commands.load_csv_data.READ_SIZE', read_size
+        ):
+            return list(read_json(self.path, FIELDS))
+
+    def test_objects_split_across_chunks(self):
+        items = [
+            {'name': f'ингредиент {number}', 'measurement_unit': 'г',
+             'extra': [number] * number}
+            for number in range(20)
+        ]
+        text = json.dumps(items, ensure_ascii=False, indent=2)
+        expected = [
+            {field: item[field] for field in FIELDS} for item in items
+        ]
+        for read_size in (1, 7, 64, len(text)):
+            with self.subTest(read_size=read_size):
+                self.assertEqual(self.read(text, read_size), expected)
+
+    def test_empty_array(self):
+        self.assertEqual(self.read(' [ ] ', 2), [])
+
+    def test_malformed(self):
+        for text in (
+            '[{"name": "соль", "measurement_unit": "г"}, {"name": ',
+            '[{"name": "соль", "measurement_unit": "г"} {"name"}]',
+        ):
+            with self.subTest(text=text):
+                with self.assertRaises(CommandError):
+                    self.read(text, 8)
+
+    def test_not_array(self):
+        with self.assertRaises(CommandError):
+            self.read('{"name": "соль"}', 8)
@@ -0,0 +1,71 @@
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, ShoppingListIngredient
+from recipes.tests.utils import BudgetAPITestCase, QueryBudgetExceeded
+from recipes.views import RecipeViewSet
+from users.models import User
+
+URL = '/api/recipes/'
+
+DOWNLOAD_URL = '/api/recipes/download_shopping_cart/'
+
+
+class MetricsTest(BudgetAPITestCase):
+    """Бюджеты запросов и заголовок Server-Timing."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='pass',
+            first_name='User', last_name='User',
+        )
+
+    def no_budget(self, action='list'):
+        return mock.patch.dict(RecipeViewSet.query_budgets, {action: 0})
+
+    def test_budget_fails_tests(self):
+        with self.no_budget(), self.assertRaises(QueryBudgetExceeded):
+            self.client.get(URL)
+
+    def test_budget_is_logged_in_requests(self):
+        with self.no_budget(), self.assertLogs('recipes.metrics') as logs:
+            response = APIClient().get(URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('RecipeViewSet.list', logs.output[0])
+
+    def test_server_timing(self):
+        response = self.client.get(URL)
+        self.assertTrue(response['Server-Timing'].startswith('total;'))
+        self.assertNotIn('queries', response['Server-Timing'])
+        self.client.force_authenticate(self.user)
+        response = self.client.get(URL)
+        self.assertIn('queries', response['Server-Timing'])
+
+    def test_streaming_queries_are_counted(self):
+        ShoppingListIngredient.objects.create(
+            user=self.user,
+            ingredient=Ingredient.objects.create(
+                name='Соль', measurement_unit='г'
+            ),
+            amount=5,
+        )
+        self.client.force_authenticate(self.user)
+        response = self.client.get(DOWNLOAD_URL)
+        self.assertEqual(response.getvalue().decode(), 'Соль 5 г')
+        self.assertGreater(response.wsgi_request.metrics.queries, 0)
+        with self.no_budget('download_shopping_cart'):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(DOWNLOAD_URL)
+
+    def test_streaming_budget_is_logged_after_stream(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with self.no_budget('download_shopping_cart'):
+            response = client.get(DOWNLOAD_URL)
+            self.assertEqual(response.wsgi_request.metrics.queries, 0)
+            with self.assertLogs('recipes.metrics') as logs:
+                b''.join(response.streaming_content)
+        self.assertIn('download_shopping_cart', logs.output[0])
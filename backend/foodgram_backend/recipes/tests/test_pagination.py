@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+
+from recipes.models import Recipe, RecipeRanking
+from recipes.tests.utils import BudgetAPITestCase
+from users.models import User
+
+
+class CursorPaginationTest(BudgetAPITestCase):
+    """Курсорная пагинация ленты рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass',
+            first_name='Author', last_name='Author',
+        )
+        now = timezone.now()
+        for number in range(7):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Рецепт {number}', text='Текст',
+                image='recipes/images/test.png', cooking_time=10,
+            )
+            RecipeRanking.objects.create(recipe=recipe, updated=now)
+        # Два рецепта с одной датой: порядок между ними задает id.
+        Recipe.objects.update(pub_date=now - timedelta(days=1))
+        Recipe.objects.filter(name__in=['Рецепт 0', 'Рецепт 1']).update(
+            pub_date=now - timedelta(days=2)
+        )
+
+    def test_pages_cover_all_recipes(self):
+        expected = list(Recipe.objects.order_by(
+            '-pub_date', '-id'
+        ).values_list('id', flat=True))
+        url = '/api/recipes/?pagination=cursor&limit=3'
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, expected)
+
+    def test_approximate_count(self):
+        response = self.client.get(
+            '/api/recipes/?pagination=cursor&count=approximate'
+        )
+        self.assertIsInstance(response.data['count'], int)
+
+    def test_cursor_rejects_other_orderings(self):
+        for query in ('ordering=popular', 'search=рецепт'):
+            response = self.client.get(
+                f'/api/recipes/?pagination=cursor&{query}'
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, query
+            )
+            self.assertIn('pagination', response.data)
+        response = self.client.get('/api/recipes/?ordering=popular')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/recipes/?cursor=bad')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
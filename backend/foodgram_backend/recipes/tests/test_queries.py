@@ -0,0 +1,137 @@
+from rest_framework import status
+
+from recipes.models import (
+    Favorite, Ingredient, IngredientRecipe, Recipe, ShoppingCart, Tag
+)
+from recipes.tests.utils import BudgetAPITestCase, make_image
+from users.models import Follow, User
+
+
+class RecipeQueriesTest(BudgetAPITestCase):
+    """Число запросов к базе не зависит от числа рецептов на странице."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass',
+            first_name='Reader', last_name='Reader',
+        )
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass',
+            first_name='Author', last_name='Author',
+        )
+        Follow.objects.create(user=cls.user, following=cls.author)
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#00000{number}',
+                slug=f'tag{number}'
+            )
+            for number in range(2)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+        cls.recipes = []
+        for number in range(5):
+            recipe = Recipe.objects.create(
+                author=cls.author, name=f'Рецепт {number}', text='Текст',
+                image='recipes/images/test.png', cooking_time=10,
+            )
+            recipe.tags.set(cls.tags)
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=5
+                )
+                for ingredient in cls.ingredients
+            )
+            cls.recipes.append(recipe)
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[1])
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_list_queries(self):
+        # Подписки, count, страница, теги, ингредиенты.
+        with self.assertNumQueries(5):
+            response = self.client.get('/api/recipes/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 5)
+        results = {
+            recipe['id']: recipe for recipe in response.data['results']
+        }
+        self.assertTrue(results[self.recipes[0].id]['is_favorited'])
+        self.assertTrue(results[self.recipes[1].id]['is_in_shopping_cart'])
+        self.assertTrue(results[self.recipes[2].id]['author'][
+            'is_subscribed'
+        ])
+
+    def test_list_queries_for_limits(self):
+        # Анонимному пользователю подписки не нужны.
+        for user, queries in ((None, 4), (self.user, 5)):
+            self.client.force_authenticate(user)
+            for limit in (1, 2, 5, 10):
+                with self.subTest(user=user, limit=limit):
+                    with self.assertNumQueries(queries):
+                        response = self.client.get(
+                            f'/api/recipes/?limit={limit}'
+                        )
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertEqual(
+                        len(response.data['results']), min(limit, 5)
+                    )
+                    self.assertEqual(
+                        response.data['results'][0]['author'][
+                            'is_subscribed'
+                        ],
+                        user is not None
+                    )
+
+    def test_list_queries_with_filters(self):
+        # Плюс запрос тегов по slug.
+        with self.assertNumQueries(6):
+            response = self.client.get(
+                '/api/recipes/?is_favorited=1&tags=tag0'
+            )
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipes[0].id]
+        )
+
+    def test_retrieve_queries(self):
+        # Подписки, рецепт, теги, ингредиенты.
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/recipes/{self.recipes[0].id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_favorited'])
+
+    def test_update_and_destroy_with_user_filters(self):
+        self.client.force_authenticate(self.author)
+        Favorite.objects.create(user=self.author, recipe=self.recipes[3])
+        response = self.client.patch(
+            f'/api/recipes/{self.recipes[3].id}/?is_favorited=1',
+            {
+                'name': 'Новое название',
+                'text': 'Текст',
+                'cooking_time': 5,
+                'image': make_image(),
+                'tags': [self.tags[0].id],
+                'ingredients': [
+                    {'id': self.ingredients[0].id, 'amount': 1}
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_favorited'])
+        response = self.client.delete(
+            f'/api/recipes/{self.recipes[4].id}/?is_in_shopping_cart=1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.delete(
+            f'/api/recipes/{self.recipes[3].id}/?is_favorited=1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
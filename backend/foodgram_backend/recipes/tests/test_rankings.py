@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+
+from recipes.models import Favorite, Recipe, RecipeRanking, ShoppingCart
+from recipes.rankings import update_rankings
+from recipes.tests.utils import BudgetAPITestCase
+from users.constants import (
+    FAVORITE_SCORE,
+    POPULAR_HALF_LIFE_DAYS,
+    SHOPPING_CART_SCORE,
+    TRENDING_HALF_LIFE_DAYS,
+)
+from users.models import User
+
+URL = '/api/recipes/'
+
+
+class RankingsTest(BudgetAPITestCase):
+    """Рейтинги popular и trending с затуханием по времени."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        author, *cls.users = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name,
+            )
+            for name in ('author', 'first', 'second', 'third')
+        )
+        cls.fresh, cls.old, cls.carted, cls.expired = (
+            Recipe.objects.create(
+                author=author, name=name, text='Текст',
+                image='recipes/images/test.png', cooking_time=10,
+            )
+            for name in ('fresh', 'old', 'carted', 'expired')
+        )
+        cls.add(Favorite, cls.users[:1], cls.fresh, days=0)
+        cls.add(Favorite, cls.users, cls.old, days=POPULAR_HALF_LIFE_DAYS)
+        cls.add(ShoppingCart, cls.users[:1], cls.carted, days=1)
+        cls.add(Favorite, cls.users[:1], cls.expired, days=200)
+
+    @classmethod
+    def add(cls, model, users, recipe, days):
+        for user in users:
+            model.objects.create(user=user, recipe=recipe)
+        model.objects.filter(recipe=recipe).update(
+            created=cls.now - timedelta(days=days)
+        )
+
+    def scores(self):
+        return {
+            ranking.recipe_id: (
+                ranking.popular_score, ranking.trending_score
+            )
+            for ranking in RecipeRanking.objects.all()
+        }
+
+    def assertScores(self, expected):
+        scores = self.scores()
+        self.assertEqual(scores.keys(), expected.keys())
+        for recipe_id, (popular, trending) in expected.items():
+            self.assertAlmostEqual(scores[recipe_id][0], popular)
+            self.assertAlmostEqual(scores[recipe_id][1], trending)
+
+    def ordered_ids(self, ordering):
+        response = self.client.get(f'{URL}?ordering={ordering}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_scores_and_ordering(self):
+        self.assertEqual(update_rankings(self.now), 3)
+        self.assertScores({
+            self.fresh.id: (FAVORITE_SCORE, FAVORITE_SCORE),
+            self.old.id: (3 * FAVORITE_SCORE / 2, 0),
+            self.carted.id: (
+                SHOPPING_CART_SCORE * 0.5 ** (1 / POPULAR_HALF_LIFE_DAYS),
+                SHOPPING_CART_SCORE * 0.5 ** (1 / TRENDING_HALF_LIFE_DAYS),
+            ),
+            self.expired.id: (0, 0),
+        })
+        self.assertEqual(self.ordered_ids('popular'), [
+            self.old.id, self.fresh.id, self.carted.id, self.expired.id,
+        ])
+        self.assertEqual(self.ordered_ids('trending'), [
+            self.fresh.id, self.carted.id, self.expired.id, self.old.id,
+        ])
+
+    def test_decay(self):
+        update_rankings(self.now)
+        update_rankings(self.now + timedelta(days=TRENDING_HALF_LIFE_DAYS))
+        fresh = RecipeRanking.objects.get(recipe=self.fresh)
+        self.assertAlmostEqual(fresh.trending_score, FAVORITE_SCORE / 2)
+        self.assertAlmostEqual(
+            fresh.popular_score,
+            FAVORITE_SCORE * 0.5 ** (
+                TRENDING_HALF_LIFE_DAYS / POPULAR_HALF_LIFE_DAYS
+            )
+        )
+        update_rankings(self.now + timedelta(days=365))
+        self.assertScores({
+            recipe.id: (0, 0)
+            for recipe in (self.fresh, self.old, self.carted, self.expired)
+        })
+        self.assertEqual(
+            self.ordered_ids('trending'),
+            sorted(self.scores(), reverse=True)
+        )
+
+    def test_new_recipes_get_rankings(self):
+        update_rankings(self.now)
+        recipe = Recipe.objects.create(
+            author=self.fresh.author, name='new', text='Текст',
+            image='recipes/images/test.png', cooking_time=10,
+        )
+        self.assertNotIn(recipe.id, self.ordered_ids('popular'))
+        update_rankings(self.now)
+        self.assertEqual(
+            self.ordered_ids('popular')[-2:], [recipe.id, self.expired.id]
+        )
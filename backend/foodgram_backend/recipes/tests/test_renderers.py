@@ -0,0 +1,52 @@
+import io
+import unittest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from recipes.renderers import ORJSONParser, ORJSONRenderer, orjson
+
+
+@unittest.skipIf(orjson is None, 'orjson is not installed')
+class ORJSONRendererTest(SimpleTestCase):
+    """Вывод и разбор совпадают со стандартными классами DRF."""
+
+    def assertSameOutput(self, data):
+        expected = JSONRenderer().render(data)
+        self.assertEqual(ORJSONRenderer().render(data), expected)
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(expected)),
+            JSONParser().parse(io.BytesIO(expected))
+        )
+
+    def test_decimal(self):
+        self.assertSameOutput({'amount': Decimal('12.50')})
+
+    def test_datetime_with_microseconds(self):
+        moment = datetime(2026, 10, 17, 12, 30, 5, 123456)
+        for tzinfo in (None, timezone.utc, timezone(timedelta(hours=3))):
+            with self.subTest(tzinfo=tzinfo):
+                self.assertSameOutput(
+                    {'pub_date': moment.replace(tzinfo=tzinfo)}
+                )
+
+    def test_lazy_string(self):
+        self.assertSameOutput({'detail': gettext_lazy('Рецепт')})
+
+    def test_validation_error(self):
+        error = ValidationError({
+            'ingredients': [{'amount': ['Убедитесь, что это значение >= 1']}],
+            'tags': 'Обязательное поле.',
+        })
+        self.assertSameOutput(error.detail)
+
+    def test_line_separators(self):
+        self.assertSameOutput({'text': 'строка\u2028абзац\u2029конец'})
+
+    def test_non_string_keys(self):
+        self.assertSameOutput({1: 'один', 'nested': {2: [3]}})
@@ -0,0 +1,87 @@
+from django.core.cache import cache
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe
+from recipes.search import recipe_search_index
+from recipes.tests.utils import BudgetAPITestCase
+from recipes.versions import RECIPES_SEARCH_VERSION, get_content_version
+from users.models import User
+
+
+class RecipeSearchTest(BudgetAPITestCase):
+    """Поиск видит изменения рецептов из любых путей записи.
+
+    На SQLite работает резервный индекс в памяти, на PostgreSQL -
+    поисковый вектор, и оба обновляются после коммита.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass',
+            first_name='Author', last_name='Author',
+        )
+        cls.flour = Ingredient.objects.create(
+            name='Мука', measurement_unit='г'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def create_recipe(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe = Recipe.objects.create(
+                author=self.author, name=name, text='Описание',
+                image='recipes/images/test.png', cooking_time=10,
+            )
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=self.flour, amount=100
+            )
+        return recipe
+
+    def search(self, query):
+        response = self.client.get(f'/api/recipes/?search={query}')
+        return [recipe['name'] for recipe in response.data['results']]
+
+    def test_writes_update_search(self):
+        recipe = self.create_recipe('Блины')
+        self.create_recipe('Оладьи')
+        self.assertEqual(self.search('блины'), ['Блины'])
+        version = get_content_version(RECIPES_SEARCH_VERSION)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.name = 'Сырники'
+            recipe.save()
+        self.assertEqual(self.search('блины'), [])
+        self.assertEqual(self.search('сырники'), ['Сырники'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flour.name = 'Крупа'
+            self.flour.save()
+        self.assertEqual(sorted(self.search('крупа')), ['Оладьи', 'Сырники'])
+        self.assertEqual(self.search('мука'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            IngredientRecipe.objects.filter(recipe=recipe).get().delete()
+        self.assertEqual(self.search('крупа'), ['Оладьи'])
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        self.assertEqual(self.search('сырники'), [])
+        self.assertEqual(
+            get_content_version(RECIPES_SEARCH_VERSION), version,
+            'Запись не должна перестраивать весь индекс'
+        )
+
+    def test_one_update_per_transaction(self):
+        recipe = self.create_recipe('Пирог')
+        with self.captureOnCommitCallbacks() as callbacks:
+            recipe.save()
+            IngredientRecipe.objects.create(
+                recipe=recipe, ingredient=self.flour, amount=1
+            )
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(callbacks[0].recipe_ids, {recipe.id})
+
+    def test_index_update_keeps_terms_sorted(self):
+        self.search('любое')
+        self.create_recipe('Ягодный пирог')
+        self.create_recipe('Абрикосовый пирог')
+        terms, _ = recipe_search_index._get_index()
+        self.assertEqual(terms, sorted(terms))
+        self.assertEqual(len(self.search('пирог')), 2)
@@ -0,0 +1,216 @@
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from recipes.models import (
+    Ingredient, IngredientRecipe, Recipe, ShoppingListIngredient, Tag
+)
+from recipes.serializers import PostRecipeSerializer
+from recipes.tests.utils import BudgetAPITestCase, make_image
+from users.models import User
+
+
+class ShoppingListTestCase(BudgetAPITestCase):
+    """Рецепты в списках покупок нескольких пользователей."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, *cls.users = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name,
+            )
+            for name in ('author', 'first', 'second', 'third')
+        )
+        cls.tag = Tag.objects.create(
+            name='Завтрак', color='#000001', slug='breakfast'
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'И{number}', measurement_unit='г')
+            for number in range(4)
+        ]
+        cls.recipe = cls.create_recipe({0: 10, 1: 20, 2: 30})
+        cls.other_recipe = cls.create_recipe({0: 1, 3: 2})
+
+    @classmethod
+    def create_recipe(cls, amounts):
+        recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Текст',
+            image='recipes/images/test.png', cooking_time=10,
+            ingredients_count=len(amounts),
+        )
+        recipe.tags.add(cls.tag)
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
+                recipe=recipe, ingredient=cls.ingredients[number],
+                amount=amount
+            )
+            for number, amount in amounts.items()
+        )
+        return recipe
+
+    def add_to_carts(self):
+        for user in self.users:
+            self.client.force_authenticate(user)
+            response = self.client.post(
+                f'/api/recipes/{self.recipe.id}/shopping_cart/'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(self.users[0])
+        response = self.client.post(
+            '/api/recipes/batch_shopping_cart/',
+            {'recipes': [self.other_recipe.id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def update_recipe(self, amounts):
+        self.client.force_authenticate(self.author)
+        response = self.client.patch(
+            f'/api/recipes/{self.recipe.id}/',
+            {
+                'image': make_image(),
+                'tags': [self.tag.id],
+                'ingredients': [
+                    {'id': self.ingredients[number].id, 'amount': amount}
+                    for number, amount in amounts.items()
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def assertShoppingListsMatchCarts(self):
+        """Списки покупок совпадают с суммой, посчитанной заново."""
+        for user in self.users:
+            expected = dict(IngredientRecipe.objects.filter(
+                recipe__shopping_carts__user=user
+            ).values('ingredient').annotate(
+                total=Sum('amount')
+            ).values_list('ingredient', 'total'))
+            actual = dict(ShoppingListIngredient.objects.filter(
+                user=user
+            ).values_list('ingredient', 'amount'))
+            self.assertEqual(actual, expected, user.username)
+
+
+class ShoppingListDeltaTest(ShoppingListTestCase):
+    """Дельты списков покупок после изменений рецептов и корзин."""
+
+    def test_update_recipe_in_several_carts(self):
+        self.add_to_carts()
+        self.assertShoppingListsMatchCarts()
+        self.update_recipe({0: 15, 2: 30, 3: 5})
+        self.assertShoppingListsMatchCarts()
+        self.assertEqual(
+            ShoppingListIngredient.objects.get(
+                user=self.users[0], ingredient=self.ingredients[3]
+            ).amount,
+            7
+        )
+
+    def test_remove_and_destroy(self):
+        self.add_to_carts()
+        self.client.force_authenticate(self.users[1])
+        response = self.client.delete(
+            f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertShoppingListsMatchCarts()
+        self.client.force_authenticate(self.author)
+        response = self.client.delete(f'/api/recipes/{self.recipe.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertShoppingListsMatchCarts()
+        self.assertFalse(ShoppingListIngredient.objects.filter(
+            user=self.users[2]
+        ).exists())
+
+
+class SetIngredientsTest(ShoppingListTestCase):
+    """Замена ингредиентов пишет только изменившиеся строки."""
+
+    def set_ingredients(self, amounts, queries):
+        """Вызов set_ingredients для копии рецепта с проверкой числа и
+        вида запросов.
+        """
+        recipe = self.create_recipe({0: 10, 1: 20, 2: 30})
+        with CaptureQueriesContext(connection) as context:
+            with self.assertNumQueries(len(queries)):
+                deltas = PostRecipeSerializer().set_ingredients(
+                    recipe,
+                    [
+                        {'id': self.ingredients[number], 'amount': amount}
+                        for number, amount in amounts.items()
+                    ]
+                )
+        self.assertEqual(
+            [query['sql'].split()[0] for query in context.captured_queries],
+            queries
+        )
+        self.assertEqual(
+            dict(recipe.ingredient_recipes.values_list(
+                'ingredient', 'amount'
+            )),
+            {
+                self.ingredients[number].id: amount
+                for number, amount in amounts.items()
+            }
+        )
+        return {
+            ingredient: delta for ingredient, delta in deltas.items()
+            if delta
+        }
+
+    def assertCartDeltas(self, amounts, deltas):
+        """Списки покупок с рецептом изменились на те же дельты."""
+        self.add_to_carts()
+        before = {
+            user: dict(ShoppingListIngredient.objects.filter(
+                user=user
+            ).values_list('ingredient', 'amount'))
+            for user in self.users
+        }
+        self.update_recipe(amounts)
+        for user in self.users:
+            after = dict(ShoppingListIngredient.objects.filter(
+                user=user
+            ).values_list('ingredient', 'amount'))
+            changes = {
+                ingredient: after.get(ingredient, 0) - before[user].get(
+                    ingredient, 0
+                )
+                for ingredient in after.keys() | before[user].keys()
+            }
+            self.assertEqual(
+                {
+                    ingredient: change
+                    for ingredient, change in changes.items() if change
+                },
+                deltas,
+                user.username
+            )
+        self.assertShoppingListsMatchCarts()
+
+    def test_unchanged(self):
+        amounts = {0: 10, 1: 20, 2: 30}
+        deltas = self.set_ingredients(amounts, ['SELECT'])
+        self.assertEqual(deltas, {})
+        self.assertCartDeltas(amounts, deltas)
+
+    def test_amount_changed(self):
+        amounts = {0: 10, 1: 25, 2: 30}
+        deltas = self.set_ingredients(amounts, ['SELECT', 'UPDATE'])
+        self.assertEqual(deltas, {self.ingredients[1].id: 5})
+        self.assertCartDeltas(amounts, deltas)
+
+    def test_ingredient_added_and_removed(self):
+        amounts = {0: 10, 1: 20, 3: 40}
+        # Удаление читает строку для сигнала post_delete (вектор поиска).
+        deltas = self.set_ingredients(
+            amounts, ['SELECT', 'SELECT', 'DELETE', 'INSERT']
+        )
+        self.assertEqual(deltas, {
+            self.ingredients[2].id: -30, self.ingredients[3].id: 40,
+        })
+        self.assertCartDeltas(amounts, deltas)
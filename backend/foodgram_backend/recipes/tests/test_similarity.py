@@ -0,0 +1,105 @@
+from rest_framework import status
+
+from recipes.models import (
+    Favorite, Ingredient, IngredientRecipe, Recipe, SimilarRecipe, Tag
+)
+from recipes.similarity import build_similar_recipes
+from recipes.tests.utils import BudgetAPITestCase
+from users.constants import SIMILAR_CONTENT_WEIGHT, SIMILAR_FAVORITE_WEIGHT
+from users.models import User
+
+
+class SimilarRecipesTest(BudgetAPITestCase):
+    """Похожие рецепты по коэффициентам Жаккара.
+
+    first: ингредиенты a, b, тег t, в избранном у alice и bob.
+    second: ингредиенты a, b, c, тег t, в избранном у alice.
+    third: ингредиент c, в избранном у carol.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        author, alice, bob, carol = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name,
+            )
+            for name in ('author', 'alice', 'bob', 'carol')
+        )
+        tag = Tag.objects.create(name='Обед', color='#000001', slug='lunch')
+        a, b, c = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in 'abc'
+        )
+        cls.first, cls.second, cls.third = (
+            Recipe.objects.create(
+                author=author, name=name, text='Текст',
+                image='recipes/images/test.png', cooking_time=10,
+            )
+            for name in ('first', 'second', 'third')
+        )
+        for recipe, ingredients, tags, users in (
+            (cls.first, (a, b), (tag,), (alice, bob)),
+            (cls.second, (a, b, c), (tag,), (alice,)),
+            (cls.third, (c,), (), (carol,)),
+        ):
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in ingredients
+            )
+            recipe.tags.set(tags)
+            Favorite.objects.bulk_create(
+                Favorite(user=user, recipe=recipe) for user in users
+            )
+        # first и second: общий 1 из 2 пользователей и 3 из 4 различных
+        # ингредиентов и тегов. second и third: общий ингредиент 1 из 4.
+        cls.first_second = (
+            SIMILAR_FAVORITE_WEIGHT * 1 / 2 + SIMILAR_CONTENT_WEIGHT * 3 / 4
+        )
+        cls.second_third = SIMILAR_CONTENT_WEIGHT * 1 / 4
+
+    def similar(self):
+        return {
+            (row.recipe_id, row.similar_id): row.score
+            for row in SimilarRecipe.objects.all()
+        }
+
+    def assertSimilar(self, expected):
+        similar = self.similar()
+        self.assertEqual(similar.keys(), expected.keys())
+        for pair, score in expected.items():
+            self.assertAlmostEqual(similar[pair], score)
+
+    def test_jaccard_scores(self):
+        self.assertEqual(build_similar_recipes(), 4)
+        first, second, third = self.first.id, self.second.id, self.third.id
+        self.assertSimilar({
+            (first, second): self.first_second,
+            (second, first): self.first_second,
+            (second, third): self.second_third,
+            (third, second): self.second_third,
+        })
+
+    def test_limit_and_rebuild(self):
+        build_similar_recipes()
+        self.assertEqual(build_similar_recipes(limit=1), 3)
+        self.assertSimilar({
+            (self.first.id, self.second.id): self.first_second,
+            (self.second.id, self.first.id): self.first_second,
+            (self.third.id, self.second.id): self.second_third,
+        })
+
+    def test_similar_action(self):
+        build_similar_recipes()
+        response = self.client.get(f'/api/recipes/{self.second.id}/similar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data],
+            [self.first.id, self.third.id]
+        )
+
+    def test_similar_unknown_recipe(self):
+        response = self.client.get('/api/recipes/999999/similar/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
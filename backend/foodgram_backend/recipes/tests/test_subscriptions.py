@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import status
+
+from recipes.models import Recipe
+from recipes.tests.utils import BudgetAPITestCase
+from users.models import Follow, User
+
+URL = '/api/users/subscriptions/'
+
+RECIPES_PER_AUTHOR = 4
+
+
+class SubscriptionsQueriesTest(BudgetAPITestCase):
+    """Число запросов подписок не зависит от числа авторов и
+    recipes_limit.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, *cls.authors = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='pass',
+                first_name=name, last_name=name,
+            )
+            for name in ('user', *(f'author{number}' for number in range(6)))
+        )
+        now = timezone.now()
+        recipes = [
+            Recipe.objects.create(
+                author=author, name=f'{author.username} {number}',
+                text='Текст', image='recipes/images/test.png',
+                cooking_time=10,
+            )
+            for author in cls.authors for number in range(RECIPES_PER_AUTHOR)
+        ]
+        for number, recipe in enumerate(recipes):
+            recipe.pub_date = now - timedelta(minutes=number)
+        Recipe.objects.bulk_update(recipes, ['pub_date'])
+        cls.latest = {}
+        for recipe in recipes:
+            cls.latest.setdefault(recipe.author_id, []).append(recipe.id)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_queries_do_not_depend_on_limit_and_subscriptions(self):
+        for subscriptions in (1, 3, 6):
+            Follow.objects.bulk_create(
+                Follow(user=self.user, following=author)
+                for author in self.authors[:subscriptions]
+            )
+            for limit in (None, 0, 1, 3, 10):
+                with self.subTest(subscriptions=subscriptions, limit=limit):
+                    params = {'limit': 10}
+                    if limit is not None:
+                        params['recipes_limit'] = limit
+                    with self.assertNumQueries(3):
+                        response = self.client.get(URL, params)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    results = response.data['results']
+                    self.assertEqual(len(results), subscriptions)
+                    for author in results:
+                        latest = self.latest[author['id']]
+                        if limit is not None:
+                            latest = latest[:limit]
+                        self.assertEqual(
+                            [recipe['id'] for recipe in author['recipes']],
+                            latest
+                        )
+            Follow.objects.filter(user=self.user).delete()
@@ -0,0 +1,80 @@
+from rest_framework import status
+
+from recipes.models import Recipe, Tag
+from recipes.tests.utils import BudgetAPITestCase
+from users.models import User
+
+URL = '/api/recipes/'
+
+
+class TagFilterTest(BudgetAPITestCase):
+    """Фильтр по тегам в режимах any и all."""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass',
+            first_name='Author', last_name='Author',
+        )
+        cls.tags = {
+            slug: Tag.objects.create(
+                name=slug, color=f'#00000{number}', slug=slug
+            )
+            for number, slug in enumerate(('breakfast', 'lunch', 'dinner'))
+        }
+        cls.recipes = {}
+        for name, slugs in (
+            ('breakfast', ['breakfast']),
+            ('brunch', ['breakfast', 'lunch']),
+            ('all_day', ['breakfast', 'lunch', 'dinner']),
+            ('supper', ['lunch', 'dinner']),
+            ('untagged', []),
+        ):
+            recipe = Recipe.objects.create(
+                author=author, name=name, text='Текст',
+                image='recipes/images/test.png', cooking_time=10,
+            )
+            recipe.tags.set(cls.tags[slug] for slug in slugs)
+            cls.recipes[name] = recipe.id
+
+    def filter(self, query):
+        response = self.client.get(f'{URL}?limit=10&{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in response.data['results']]
+        self.assertEqual(len(ids), len(set(ids)), 'повторы рецептов')
+        self.assertEqual(response.data['count'], len(ids))
+        return set(ids)
+
+    def names(self, *names):
+        return {self.recipes[name] for name in names}
+
+    def test_any(self):
+        for query in (
+            'tags=breakfast&tags=lunch',
+            'tags=breakfast&tags=lunch&tags_mode=any',
+        ):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.filter(query),
+                    self.names('breakfast', 'brunch', 'all_day', 'supper')
+                )
+
+    def test_all(self):
+        self.assertEqual(
+            self.filter('tags=breakfast&tags=lunch&tags_mode=all'),
+            self.names('brunch', 'all_day')
+        )
+        self.assertEqual(
+            self.filter('tags=lunch&tags=dinner&tags=lunch&tags_mode=all'),
+            self.names('all_day', 'supper')
+        )
+
+    def test_mode_without_tags(self):
+        self.assertEqual(
+            self.filter('tags_mode=all'), set(self.recipes.values())
+        )
+
+    def test_unknown_mode(self):
+        response = self.client.get(f'{URL}?tags=breakfast&tags_mode=some')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tags_mode', response.data)
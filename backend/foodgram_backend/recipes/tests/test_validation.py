@@ -0,0 +1,104 @@
+from rest_framework import serializers, status
+
+from recipes.models import Ingredient, Tag
+from recipes.serializers import PostRecipeSerializer
+from recipes.tests.utils import BudgetAPITestCase, make_image
+from users.models import User
+
+URL = '/api/recipes/'
+
+UNKNOWN_ID = 999999
+
+
+class ReferenceIngredientSerializer(serializers.Serializer):
+    """Поля ингредиента до проверки одним запросом."""
+
+    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    amount = serializers.IntegerField()
+
+
+class ReferenceRecipeSerializer(serializers.Serializer):
+    """Связи рецепта через PrimaryKeyRelatedField, по запросу на id."""
+
+    tags = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Tag.objects.all()
+    )
+    ingredients = ReferenceIngredientSerializer(many=True)
+
+
+class RelationsValidationTest(BudgetAPITestCase):
+    """Ингредиенты и теги рецепта проверяются одним запросом на связь."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass',
+            first_name='Author', last_name='Author',
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {number}', color=f'#0000{number:02}',
+                slug=f'tag{number}'
+            )
+            for number in range(10)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'И{number}', measurement_unit='г')
+            for number in range(10)
+        ]
+
+    def payload(self, tag_ids, ingredient_ids):
+        return {
+            'name': 'Рецепт',
+            'text': 'Текст',
+            'cooking_time': 5,
+            'image': make_image(),
+            'tags': tag_ids,
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 2}
+                for ingredient_id in ingredient_ids
+            ],
+        }
+
+    def test_single_query_per_relation(self):
+        for size in (1, 10):
+            with self.subTest(size=size):
+                serializer = PostRecipeSerializer(data=self.payload(
+                    [tag.id for tag in self.tags[:size]],
+                    [ingredient.id for ingredient in self.ingredients[:size]],
+                ))
+                with self.assertNumQueries(2):
+                    self.assertTrue(serializer.is_valid(), serializer.errors)
+                self.assertEqual(
+                    serializer.validated_data['tags'], self.tags[:size]
+                )
+                self.assertEqual(
+                    [
+                        ingredient['id']
+                        for ingredient in serializer.validated_data[
+                            'ingredients'
+                        ]
+                    ],
+                    self.ingredients[:size]
+                )
+
+    def test_unknown_ids(self):
+        self.client.force_authenticate(self.author)
+        for field, tag_ids, ingredient_ids in (
+            ('tags', [self.tags[0].id, UNKNOWN_ID], [self.ingredients[0].id]),
+            (
+                'ingredients',
+                [self.tags[0].id],
+                [self.ingredients[0].id, UNKNOWN_ID, UNKNOWN_ID + 1],
+            ),
+        ):
+            with self.subTest(field=field):
+                payload = self.payload(tag_ids, ingredient_ids)
+                reference = ReferenceRecipeSerializer(data=payload)
+                self.assertFalse(reference.is_valid())
+                response = self.client.post(URL, payload, format='json')
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST
+                )
+                self.assertEqual(response.data, reference.errors)
+                self.assertEqual(list(response.data), [field])
@@ -0,0 +1,46 @@
+import base64
+import io
+
+from PIL import Image
+from rest_framework.test import APIClient, APITestCase
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Эндпоинт выполнил больше запросов, чем указано в его бюджете."""
+
+
+class QueryBudgetClient(APIClient):
+    """Клиент, который проверяет бюджет запросов каждого ответа.
+
+    Потоковый ответ читается целиком: его запросы выполняются при чтении.
+    """
+
+    def request(self, **kwargs):
+        response = super().request(**kwargs)
+        if response.streaming:
+            response.streaming_content = [
+                b''.join(response.streaming_content)
+            ]
+        metrics = getattr(response.wsgi_request, 'metrics', None)
+        if metrics is not None and metrics.over_budget:
+            raise QueryBudgetExceeded(
+                f'{metrics.endpoint}: {metrics.queries} queries, '
+                f'budget {metrics.budget}'
+            )
+        return response
+
+
+class BudgetAPITestCase(APITestCase):
+    """Тесты API с проверкой бюджетов запросов эндпоинтов."""
+
+    client_class = QueryBudgetClient
+
+
+def make_image():
+    """Изображение в формате data URL для полей Base64ImageField."""
+    image = io.BytesIO()
+    Image.new('RGB', (10, 10), 'red').save(image, 'PNG')
+    return (
+        'data:image/png;base64,'
+        + base64.b64encode(image.getvalue()).decode()
+    )
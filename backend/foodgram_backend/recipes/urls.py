@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from recipes.views import (
     IngredientViewSet,
+    MetricsView,
     RecipeViewSet,
     TagViewSet,
 )
@@ -22,6 +23,7 @@ router_v1.register('users', UserViewSet, basename='users')
 
 
 urlpatterns = [
+    path('metrics/', MetricsView.as_view()),
     path('users/subscriptions/', SubscriptionViewSet.as_view()),
     path('', include(router_v1.urls)),
     path('auth/', include('djoser.urls')),
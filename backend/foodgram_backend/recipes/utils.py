@@ -1,28 +1,127 @@
-from django.http import HttpResponse
-
-
-def download(shop_list):
-    file_name = 'shopping_cart.txt'
-    ingredients = {}
-    for recipe in shop_list:
-        for ing in recipe:
-            name = ing.ingredient.name
-            if name not in ingredients:
-                ingredients[name] = {
-                    'amount': ing.amount,
-                    'measurement_unit': ing.ingredient.measurement_unit
-                }
-            else:
-                ingredients[name]['amount'] += ing.amount
-    file_data = []
+import csv
+import os
+from itertools import islice
+from tempfile import TemporaryFile
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.negotiation import DefaultContentNegotiation
+
+from users.constants import EXPORT_CHUNK_SIZE, PDF_LINES_PER_PAGE
+
+FILE_NAME = 'shopping_cart'
+
+PDF_FONT_NAME = 'ShoppingCartFont'
+
+PDF_MARGIN = 40
+
+EXPORT_FORMATS = {}
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """Параметр format выбирает формат файла, а не рендерер DRF."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class Echo:
+    """Псевдо-файл для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_format(name, content_type):
+    """Регистрация генератора файла списка покупок."""
+    def decorator(func):
+        EXPORT_FORMATS[name] = (func, content_type)
+        return func
+    return decorator
+
+
+def ingredient_lines(ingredients):
+    for ingredient in ingredients:
+        yield (
+            f'{ingredient["name"]} {ingredient["total_amount"]} '
+            f'{ingredient["measurement_unit"]}'
+        )
+
+
+@export_format('txt', 'text/plain; charset=utf-8')
+def stream_txt(ingredients):
+    separator = ''
+    for line in ingredient_lines(ingredients):
+        yield f'{separator}{line}'
+        separator = '\n'
+
+
+@export_format('csv', 'text/csv; charset=utf-8')
+def stream_csv(ingredients):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('Ингредиент', 'Количество', 'Единица измерения'))
     for ingredient in ingredients:
-        data = ''
-        data += str(ingredient)
-        for j in ingredients[ingredient]:
-            data += f' {str(ingredients[ingredient][j])}'
-        file_data.append(data)
-    content = '\n'.join(file_data)
-    content_type = 'text/plain,charset=utf8'
-    response = HttpResponse(content, content_type=content_type)
-    response['Content-Disposition'] = f'attachment; filename={file_name}'
+        yield writer.writerow((
+            ingredient['name'],
+            ingredient['total_amount'],
+            ingredient['measurement_unit'],
+        ))
+
+
+def get_pdf_font():
+    """Шрифт с кириллицей, если он доступен, иначе стандартный."""
+    if PDF_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return PDF_FONT_NAME
+    font_path = settings.SHOPPING_CART_PDF_FONT
+    if not os.path.exists(font_path):
+        return 'Helvetica'
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, font_path))
+    return PDF_FONT_NAME
+
+
+@export_format('pdf', 'application/pdf')
+def stream_pdf(ingredients):
+    """PDF по страницам: строки читаются из базы порциями на страницу.
+
+    Таблицу ссылок PDF reportlab пишет только в save(), поэтому документ
+    собирается целиком во временном файле на диске, а не в памяти, и
+    уже из него отдается порциями. Страницы до save() reportlab держит
+    в памяти сжатыми; их число ограничено размером справочника
+    ингредиентов, так как в списке покупок ингредиенты не повторяются.
+    """
+    font = get_pdf_font()
+    _, height = A4
+    line_height = (height - 2 * PDF_MARGIN) / PDF_LINES_PER_PAGE
+    lines = ingredient_lines(ingredients)
+    with TemporaryFile() as file:
+        pdf = canvas.Canvas(file, pagesize=A4, pageCompression=1)
+        page = list(islice(lines, PDF_LINES_PER_PAGE))
+        while page:
+            pdf.setFont(font, 12)
+            for number, line in enumerate(page):
+                pdf.drawString(
+                    PDF_MARGIN, height - PDF_MARGIN - number * line_height,
+                    line
+                )
+            pdf.showPage()
+            page = list(islice(lines, PDF_LINES_PER_PAGE))
+        pdf.save()
+        file.seek(0)
+        yield from iter(lambda: file.read(EXPORT_CHUNK_SIZE), b'')
+
+
+def download(ingredients, file_format):
+    """Потоковая выгрузка списка покупок в выбранном формате."""
+    stream, content_type = EXPORT_FORMATS[file_format]
+    response = StreamingHttpResponse(
+        stream(ingredients.iterator(chunk_size=EXPORT_CHUNK_SIZE)),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename={FILE_NAME}.{file_format}'
+    )
     return response
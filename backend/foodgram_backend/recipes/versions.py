@@ -0,0 +1,34 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+
+INGREDIENTS_VERSION = 'ingredients'
+
+TAGS_VERSION = 'tags'
+
+RECIPES_SEARCH_VERSION = 'recipes_search'
+
+
+def get_version_key(name):
+    return f'content_version:{name}'
+
+
+def get_content_version(name):
+    """Текущая версия содержимого, общая для всех воркеров через кеш.
+
+    Кеш должен быть общим (memcached): иначе изменения из
+    management-команд и других воркеров не дойдут до этого процесса.
+
+    Версия случайная, а не счетчик: после вытеснения ключа из кеша
+    новая версия не совпадет ни с одним ранее выданным ETag.
+    """
+    key = get_version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_content_version(name):
+    cache.set(get_version_key(name), uuid4().hex, timeout=None)
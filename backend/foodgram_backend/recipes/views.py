@@ -1,6 +1,9 @@
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import permissions, status, viewsets
+from rest_framework import permissions, status, views, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import (
     IsAuthenticated, IsAuthenticatedOrReadOnly
@@ -8,54 +11,180 @@ from rest_framework.permissions import (
 from rest_framework.response import Response
 from rest_framework.validators import ValidationError
 
+from recipes.counters import change_counter
 from recipes.filters import IngredientsSearch, RecipeFilter
+from recipes.indexes import ingredient_index
+from recipes.metrics import registry
+from recipes.mixins import MetricsMixin, VersionedCacheMixin
 from recipes.models import (
     Ingredient,
-    IngredientRecipe,
     Favorite,
     Recipe,
     ShoppingCart,
+    ShoppingListIngredient,
     Tag,
 )
-from recipes.pagination import Pagination
-from recipes.permissions import IsAuthorOrReadOnly
+from recipes.pagination import FeedPagination, Pagination, RecipePagination
+from recipes.permissions import IsAuthorOrReadOnly, IsMetricsScraper
 from recipes.serializers import (
+    CookableQuerySerializer,
+    CookableRecipeSerializer,
     FavoriteSerializer,
     GetRecipeSerializer,
     IngredientSerializer,
     PostRecipeSerializer,
+    RecipeIdsSerializer,
     ShoppingCartSerializer,
     TagSerializer,
 )
-from recipes.utils import download
+from recipes.utils import EXPORT_FORMATS, ExportContentNegotiation, download
+from recipes.versions import INGREDIENTS_VERSION, TAGS_VERSION
+from users.constants import PROMETHEUS_CONTENT_TYPE, SIMILAR_RECIPES_LIMIT
+from users.models import User
+from users.serializers import RecipeForFollowSerializer
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+def lock_user(user):
+    """Блокировка строки пользователя до конца транзакции.
+
+    Изменения избранного и списка покупок одного пользователя выполняются
+    по очереди, поэтому прочитанные после блокировки связи совпадают с
+    теми, что будут добавлены или удалены, и счетчики не расходятся.
+    Рецепты блокируются после пользователя (Recipe.objects.lock()).
+    """
+    list(User.objects.select_for_update().filter(pk=user.pk).values_list(
+        'pk', flat=True
+    ))
+
+
+class IngredientViewSet(
+    MetricsMixin, VersionedCacheMixin, viewsets.ReadOnlyModelViewSet
+):
     """ViewSet модели Ingredient."""
 
+    content_version_name = INGREDIENTS_VERSION
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (IngredientsSearch,)
     search_fields = ('^name',)
     pagination_class = None
+    query_budgets = {'list': 3, 'retrieve': 3}
 
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get(IngredientsSearch.search_param):
+            return super().list(request, *args, **kwargs)
+        return self.get_cached_response(request, self.search_by_name)
 
-class RecipeViewSet(viewsets.ModelViewSet):
+    def search_by_name(self, request):
+        """Поиск по индексу ингредиентов в памяти."""
+        return Response(ingredient_index.search(
+            request.query_params[IngredientsSearch.search_param]
+        ))
+
+
+class RecipeViewSet(MetricsMixin, viewsets.ModelViewSet):
     """ViewSet модели Recipe."""
 
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
-    pagination_class = Pagination
+    pagination_class = RecipePagination
     permission_classes = (IsAuthorOrReadOnly, IsAuthenticatedOrReadOnly)
+    query_budgets = {
+        'list': 9,
+        'retrieve': 6,
+        'create': 14,
+        'update': 19,
+        'partial_update': 19,
+        'destroy': 22,
+        'feed': 7,
+        'cookable': 10,
+        'similar': 4,
+        'favorite': 8,
+        'shopping_cart': 18,
+        'batch_favorite': 7,
+        'batch_shopping_cart': 13,
+        'download_shopping_cart': 2,
+    }
 
     def get_queryset(self):
-        return Recipe.objects.all()
+        """Флаги пользователя нужны во всех действиях: по ним фильтрует
+        RecipeFilter, в том числе в get_object() при изменении и удалении.
+        """
+        if self.action in ('list', 'retrieve', 'cookable', 'feed'):
+            queryset = Recipe.objects.with_related()
+        else:
+            queryset = Recipe.objects.select_related('author')
+        return queryset.with_user_flags(self.request.user)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        user = self.request.user
+        if (
+            self.request.method in permissions.SAFE_METHODS
+            and user.is_authenticated
+        ):
+            context['subscriptions'] = set(
+                user.follow.values_list('following_id', flat=True)
+            )
+        return context
 
     def get_serializer_class(self):
+        if self.action == 'cookable':
+            return CookableRecipeSerializer
         if self.request.method not in permissions.SAFE_METHODS:
             return PostRecipeSerializer
         return GetRecipeSerializer
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        Recipe.objects.filter(pk=instance.pk).lock()
+        ShoppingListIngredient.objects.remove_recipe(
+            list(instance.shopping_carts.values_list('user_id', flat=True)),
+            instance.id
+        )
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+        )
+        instance.delete()
+
+    @action(
+        detail=False,
+        methods=['get'],
+        permission_classes=[IsAuthenticated],
+        pagination_class=FeedPagination
+    )
+    def feed(self, request):
+        """Лента новых рецептов авторов из подписок."""
+        positions = self.paginator.paginate_feed(request.user, request)
+        recipes = self.get_queryset().in_bulk([id for _, id in positions])
+        page = [recipes[id] for _, id in positions if id in recipes]
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk):
+        """Похожие рецепты, рассчитанные командой build_similar_recipes."""
+        get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        recipes = Recipe.objects.filter(similar_to__recipe_id=pk).only(
+            'name', 'cooking_time', 'image', 'image_renditions'
+        ).order_by('-similar_to__score')[:SIMILAR_RECIPES_LIMIT]
+        return Response(RecipeForFollowSerializer(
+            recipes, many=True, context={'request': request}
+        ).data)
+
+    @action(detail=False, methods=['get'], pagination_class=Pagination)
+    def cookable(self, request):
+        """Рецепты, которые можно приготовить из имеющихся ингредиентов."""
+        params = CookableQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = self.get_queryset().cookable(
+            params.validated_data.pop('ingredients'),
+            **params.validated_data
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=True,
         methods=['post', 'delete'],
@@ -65,8 +194,12 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Избранное."""
         message = 'избранное'
         if request.method == 'POST':
-            return self.add_recipe(request, pk, FavoriteSerializer)
-        return self.delete_recipe(request, pk, Favorite, message)
+            return self.add_recipe(
+                request, pk, FavoriteSerializer, 'favorites_count'
+            )
+        return self.delete_recipe(
+            request, pk, Favorite, message, 'favorites_count'
+        )
 
     @action(
         detail=True,
@@ -76,29 +209,120 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def shopping_cart(self, request, pk):
         """Список покупок."""
         message = 'список покупок'
-        if request.method == 'POST':
-            return self.add_recipe(request, pk, ShoppingCartSerializer)
-        return self.delete_recipe(request, pk, ShoppingCart, message)
+        user_ids = [request.user.id]
+        with transaction.atomic():
+            lock_user(request.user)
+            Recipe.objects.filter(pk=pk).lock()
+            if request.method == 'POST':
+                response = self.add_recipe(
+                    request, pk, ShoppingCartSerializer, 'carts_count'
+                )
+                ShoppingListIngredient.objects.add_recipe(user_ids, pk)
+                return response
+            response = self.delete_recipe(
+                request, pk, ShoppingCart, message, 'carts_count'
+            )
+            ShoppingListIngredient.objects.remove_recipe(user_ids, pk)
+            return response
 
     @action(
         detail=False,
-        methods=['get', ],
+        methods=['post', 'delete'],
+        permission_classes=[IsAuthenticated]
+    )
+    def batch_favorite(self, request):
+        """Избранное для нескольких рецептов."""
+        return self.change_recipes(request, Favorite, 'favorites_count')
+
+    @action(
+        detail=False,
+        methods=['post', 'delete'],
         permission_classes=[IsAuthenticated]
     )
+    def batch_shopping_cart(self, request):
+        """Список покупок для нескольких рецептов."""
+        return self.change_recipes(
+            request, ShoppingCart, 'carts_count', shopping_list=True
+        )
+
+    @action(
+        detail=False,
+        methods=['get', ],
+        permission_classes=[IsAuthenticated],
+        content_negotiation_class=ExportContentNegotiation
+    )
     def download_shopping_cart(self, request):
         """Скачать список покупок."""
-        recipes = [obj.recipe for obj in ShoppingCart.objects.filter(
+        file_format = request.query_params.get('format', 'txt')
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                f'Доступные форматы: {", ".join(EXPORT_FORMATS)}'
+            )
+        ingredients = ShoppingListIngredient.objects.filter(
             user=request.user
-        )]
-        ingredients = []
-        for id in range(len(recipes)):
-            ingredients.append(
-                IngredientRecipe.objects.filter(recipe=recipes[id])
+        ).values(
+            'ingredient',
+            name=F('ingredient__name'),
+            measurement_unit=F('ingredient__measurement_unit'),
+            total_amount=F('amount'),
+        ).order_by('name', 'measurement_unit')
+        return download(ingredients, file_format)
+
+    @transaction.atomic
+    def change_recipes(self, request, model, counter, shopping_list=False):
+        """Добавить или удалить несколько рецептов одним запросом.
+
+        Возвращает статус каждого рецепта: added, exists, removed, absent
+        или not_found.
+        """
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = list(dict.fromkeys(serializer.validated_data['recipes']))
+        user = request.user
+        lock_user(user)
+        recipes = Recipe.objects.filter(id__in=recipe_ids)
+        if shopping_list:
+            found = recipes.lock()
+        else:
+            found = set(recipes.values_list('id', flat=True))
+        present = set(model.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+        if request.method == 'POST':
+            changed = found - present
+            unchanged_status, changed_status = 'exists', 'added'
+            model.objects.bulk_create(
+                [model(user=user, recipe_id=id) for id in changed],
+                ignore_conflicts=True
             )
-        return download(ingredients)
+            change_counter(Recipe.objects.filter(id__in=changed), counter, 1)
+            if shopping_list:
+                ShoppingListIngredient.objects.add_recipes([user.id], changed)
+        else:
+            changed = present
+            unchanged_status, changed_status = 'absent', 'removed'
+            model.objects.filter(user=user, recipe_id__in=changed).delete()
+            change_counter(Recipe.objects.filter(id__in=changed), counter, -1)
+            if shopping_list:
+                ShoppingListIngredient.objects.remove_recipes(
+                    [user.id], changed
+                )
+        return Response({'results': [
+            {
+                'id': id,
+                'status': (
+                    'not_found' if id not in found
+                    else changed_status if id in changed
+                    else unchanged_status
+                ),
+            }
+            for id in recipe_ids
+        ]})
 
-    def add_recipe(self, request, pk, serializer_class):
+    @transaction.atomic
+    def add_recipe(self, request, pk, serializer_class, counter):
         """Добавить рецепт в избранное или список покупок."""
+        lock_user(request.user)
         data = {
             'user': request.user.id,
             'recipe': pk
@@ -108,22 +332,41 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        change_counter(Recipe.objects.filter(pk=pk), counter, 1)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def delete_recipe(self, request, pk, model, message):
+    @transaction.atomic
+    def delete_recipe(self, request, pk, model, message, counter):
         """Удалить рецепт из избранного или списка покупок."""
         recipe = get_object_or_404(Recipe, pk=pk)
         user = self.request.user
-        if not model.objects.filter(user=user, recipe=recipe).exists():
+        lock_user(user)
+        deleted, _ = model.objects.filter(user=user, recipe=recipe).delete()
+        if not deleted:
             raise ValidationError(f'Рецепт не добавлен в {message}')
-        obj = get_object_or_404(model, recipe=recipe, user=user)
-        obj.delete()
+        change_counter(Recipe.objects.filter(pk=pk), counter, -1)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(
+    MetricsMixin, VersionedCacheMixin, viewsets.ReadOnlyModelViewSet
+):
     """ViewSet модели Tag."""
 
+    content_version_name = TAGS_VERSION
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     pagination_class = None
+    query_budgets = {'list': 2, 'retrieve': 2}
+
+
+class MetricsView(views.APIView):
+    """Метрики эндпоинтов в текстовом формате Prometheus."""
+
+    permission_classes = (IsMetricsScraper,)
+    content_negotiation_class = ExportContentNegotiation
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(), content_type=PROMETHEUS_CONTENT_TYPE
+        )
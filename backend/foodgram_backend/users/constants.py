@@ -13,3 +13,71 @@ MIN_VALUE = 1
 PAGE_SIZE_QUERY_PARAM = 'limit'
 
 PAGE_SIZE = 6
+
+EXPORT_CHUNK_SIZE = 2000
+
+PDF_LINES_PER_PAGE = 50
+
+INGREDIENT_SEARCH_LIMIT = 20
+
+REFERENCE_CACHE_MAX_AGE = 60
+
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
+PAGINATION_QUERY_PARAM = 'pagination'
+
+CURSOR_QUERY_PARAM = 'cursor'
+
+COUNT_QUERY_PARAM = 'count'
+
+RENDITION_WIDTHS = (320, 640, 1280)
+
+RENDITION_QUALITY = 80
+
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+
+IMAGE_MAX_PIXELS = 25_000_000
+
+IMAGE_MAX_SIDE = 8000
+
+IMAGE_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+SEARCH_CONFIG = 'russian'
+
+SEARCH_FALLBACK_LIMIT = 1000
+
+FEED_TIMELINE_LIMIT = 500
+
+FEED_FANOUT_MAX_FOLLOWERS = 10_000
+
+FAVORITE_SCORE = 1.0
+
+SHOPPING_CART_SCORE = 0.5
+
+POPULAR_HALF_LIFE_DAYS = 30
+
+POPULAR_WINDOW_DAYS = 180
+
+TRENDING_HALF_LIFE_DAYS = 1
+
+TRENDING_WINDOW_DAYS = 7
+
+RANKING_BATCH_SIZE = 1000
+
+SIMILAR_RECIPES_LIMIT = 10
+
+SIMILAR_FAVORITE_WEIGHT = 0.6
+
+SIMILAR_CONTENT_WEIGHT = 0.4
+
+SIMILAR_MAX_GROUP_SIZE = 500
+
+SIMILAR_BATCH_SIZE = 2000
+
+BATCH_MAX_RECIPES = 100
+
+COOKABLE_MAX_MISSING = 3
+
+METRICS_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
@@ -29,6 +29,12 @@ class User(AbstractUser):
         'Адрес электронной почты', unique=True, max_length=EMAIL_MAX_LENGTH
     )
     password = models.CharField('Пароль', max_length=MAX_LENGTH)
+    recipes_count = models.PositiveIntegerField(
+        'Количество рецептов', default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков', default=0
+    )
 
     class Meta:
         constraints = [
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from recipes.images import get_rendition_urls
 from recipes.models import Recipe
 from users.models import Follow, User
 
@@ -55,7 +56,14 @@ class UserSerializer(serializers.ModelSerializer):
 
     def get_is_subscribed(self, obj):
         """Проверка подписки."""
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        subscriptions = self.context.get('subscriptions')
+        if subscriptions is not None:
+            return obj.id in subscriptions
         user = self.context.get('request').user
+        if user.id == obj.id:
+            return False
         return user.is_authenticated and user.follow.filter(
             following=obj
         ).exists()
@@ -75,9 +83,15 @@ class UserSerializer(serializers.ModelSerializer):
 class RecipeForFollowSerializer(serializers.ModelSerializer):
     """Сериализатор для рецепта в FollowSerializer."""
 
+    image_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'cooking_time', 'image',)
+        fields = ('id', 'name', 'cooking_time', 'image', 'image_renditions')
+
+    def get_image_renditions(self, obj):
+        """Ссылки на уменьшенные копии изображения."""
+        return get_rendition_urls(obj, self.context.get('request'))
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -125,9 +139,13 @@ class SubscriptionSerializer(UserSerializer):
 
     def get_recipes(self, obj):
         """"Список рецептов."""
-        recipes = Recipe.objects.filter(author=obj)
         request = self.context.get('request')
         context = {'request': request}
+        if hasattr(obj, 'latest_recipes'):
+            return RecipeForFollowSerializer(
+                obj.latest_recipes, many=True, context=context
+            ).data
+        recipes = Recipe.objects.filter(author=obj)
         limit = request.GET.get('recipes_limit')
         if limit and limit.isdigit():
             recipes = recipes[:int(limit)]
@@ -137,4 +155,4 @@ class SubscriptionSerializer(UserSerializer):
 
     def get_recipes_count(self, obj):
         """Колличество рецептов."""
-        return obj.recipes.count()
+        return obj.recipes_count
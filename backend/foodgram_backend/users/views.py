@@ -1,3 +1,6 @@
+from django.db import transaction
+from django.db.models import Prefetch, Value
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from djoser.serializers import SetPasswordSerializer
 from rest_framework import status, viewsets, views
@@ -7,6 +10,10 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 
 from users.models import Follow, User
+from recipes.counters import change_counter
+from recipes.feeds import add_author_to_feed, remove_author_from_feed
+from recipes.mixins import MetricsMixin
+from recipes.models import Recipe
 from recipes.pagination import Pagination
 from users.serializers import (
     CreateUserSerializer,
@@ -16,12 +23,13 @@ from users.serializers import (
 )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(MetricsMixin, viewsets.ModelViewSet):
     """ViewSet модели User."""
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
     pagination_class = Pagination
+    query_budgets = {'retrieve': 3, 'me': 2}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -60,23 +68,41 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class SubscriptionViewSet(ListAPIView):
+class SubscriptionViewSet(MetricsMixin, ListAPIView):
     """ViewSet модели Subscription."""
 
     serializer_class = SubscriptionSerializer
     pagination_class = Pagination
     permission_classes = (IsAuthenticated,)
+    query_budgets = {'get': 4}
 
     def get_queryset(self):
-        return User.objects.filter(following__user=self.request.user)
-
-
-class SubscribeView(views.APIView):
+        user = self.request.user
+        recipes = Recipe.objects.filter(
+            author__following__user=user
+        ).only(
+            'name', 'image', 'image_renditions', 'cooking_time', 'author'
+        )
+        limit = self.request.query_params.get('recipes_limit')
+        if limit and limit.isdigit():
+            recipes = recipes.latest_per_author(int(limit))
+        return User.objects.filter(following__user=user).annotate(
+            is_subscribed=Value(True)
+        ).prefetch_related(Prefetch(
+            'recipes',
+            queryset=recipes.order_by('-pub_date', '-id'),
+            to_attr='latest_recipes'
+        ))
+
+
+class SubscribeView(MetricsMixin, views.APIView):
     """ViewSet модели Subscribe."""
 
     pagination_class = Pagination
     permission_classes = (IsAuthenticated,)
+    query_budgets = {'post': 12, 'delete': 9}
 
+    @transaction.atomic
     def post(self, request, pk):
         following = get_object_or_404(User, pk=pk)
         user = self.request.user
@@ -87,15 +113,25 @@ class SubscribeView(views.APIView):
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        change_counter(
+            User.objects.filter(pk=following.pk), 'followers_count', 1
+        )
+        add_author_to_feed(user.id, following.id)
         return Response(
             data=serializer.data, status=status.HTTP_201_CREATED
         )
 
+    @transaction.atomic
     def delete(self, request, pk):
         following = get_object_or_404(User, pk=pk)
         user = self.request.user
-        subscription = get_object_or_404(
-            Follow, user=user, following=following
+        deleted, _ = Follow.objects.filter(
+            user=user, following=following
+        ).delete()
+        if not deleted:
+            raise Http404
+        change_counter(
+            User.objects.filter(pk=following.pk), 'followers_count', -1
         )
-        subscription.delete()
+        remove_author_from_feed(user.id, following)
         return Response(status=status.HTTP_204_NO_CONTENT)